@@ -0,0 +1,116 @@
+"""Replace Advert description unique index with description hash
+
+Revision ID: c7e2f08a913d
+Revises: 9d41a6c2e8b7
+Create Date: 2026-10-18 11:48:05.217734
+
+"""
+import hashlib
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2f08a913d'
+down_revision = '9d41a6c2e8b7'
+branch_labels = None
+depends_on = None
+
+advert = sa.table(
+    'advert',
+    sa.column('id', sa.Integer),
+    sa.column('description', sa.Text),
+    sa.column('description_hash', sa.String),
+)
+
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def description_digest(description):
+    # Копия app.core.db.models.description_digest на момент миграции.
+    normalized = ' '.join(description.split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def backfill_description_hashes(connection):
+    """
+    Заполняет description_hash порциями по id: в памяти только одна
+    порция, и на порцию приходится один executemany, а не UPDATE
+    на строку.
+    """
+    update_hash = (
+        advert.update()
+        .where(advert.c.id == sa.bindparam('advert_id'))
+        .values(description_hash=sa.bindparam('digest'))
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(advert.c.id, advert.c.description)
+            .where(advert.c.id > last_id)
+            .order_by(advert.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(update_hash, [
+            {
+                'advert_id': advert_id,
+                'digest': description_digest(description),
+            }
+            for advert_id, description in rows
+        ])
+        last_id = rows[-1].id
+
+
+def check_description_hashes_are_unique(connection):
+    """
+    Проверяет, что хеши описаний не повторяются.
+    Описания, различающиеся только пробелами, были разными для прежнего
+    ограничения на description, но получают одинаковый хеш. Такие
+    объявления нужно изменить или удалить вручную: миграция
+    останавливается со списком их id, а не выбирает сама, какие
+    строки удалить.
+    """
+    rows = connection.execute(
+        sa.select(advert.c.description_hash, advert.c.id)
+        .where(advert.c.description_hash.in_(
+            sa.select(advert.c.description_hash)
+            .group_by(advert.c.description_hash)
+            .having(sa.func.count() > 1)
+        ))
+        .order_by(advert.c.description_hash, advert.c.id)
+    ).fetchall()
+    if not rows:
+        return
+    duplicates = defaultdict(list)
+    for description_hash, advert_id in rows:
+        duplicates[description_hash].append(str(advert_id))
+    raise RuntimeError(
+        'Описания объявлений совпадают без учёта пробелов, ограничение '
+        'advert_description_hash_key нарушено. Измените или удалите '
+        'дубликаты и повторите миграцию. id объявлений по группам: '
+        + '; '.join(', '.join(ids) for ids in duplicates.values())
+    )
+
+
+def upgrade():
+    op.add_column('advert', sa.Column('description_hash', sa.String(length=64), nullable=True))
+    connection = op.get_bind()
+    backfill_description_hashes(connection)
+    check_description_hashes_are_unique(connection)
+
+    with op.batch_alter_table('advert', schema=None) as batch_op:
+        batch_op.alter_column('description_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.create_unique_constraint('advert_description_hash_key', ['description_hash'])
+        batch_op.drop_constraint('advert_description_key', type_='unique')
+
+
+def downgrade():
+    with op.batch_alter_table('advert', schema=None) as batch_op:
+        batch_op.create_unique_constraint('advert_description_key', ['description'])
+        batch_op.drop_constraint('advert_description_hash_key', type_='unique')
+        batch_op.drop_column('description_hash')
@@ -1,27 +1,48 @@
 from http import HTTPStatus
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import conlist
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db.db import get_async_session
+from app.core.db.db import get_async_session, get_read_async_session
+from app.core.settings import settings
 from app.core.user import current_user, current_superuser
 from app.core.db.crud.advert import advert_crud
 from app.core.db.crud.complaint import complaint_crud
 from app.core.db.crud.feedback import feedback_crud
-from app.core.db.models import User
+from app.core.db.models import Advert, User
+from app.core.purger import advert_purger
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json_response
+from app.api.http_cache import (
+    NOT_MODIFIED_RESPONSE,
+    check_not_modified,
+    object_etag,
+    page_etag,
+)
 from app.api.schemas.advert import (
+    AdvertBulkResult,
     AdvertCreate,
     AdvertDB,
+    AdvertPage,
     AdvertUpdate,
 )
-from app.api.schemas.feedback import FeedbackDB
+from app.api.schemas.complaint import ComplaintPage
+from app.api.schemas.feedback import FeedbackPage
 from app.core.validators import (
-    check_advert_description_is_unique,
+    check_descriptions_are_unique,
     check_user_update_delete_rights,
 )
 
 advert_router = APIRouter()
 
+# Поля объявления в общих списках и выгрузке (без автора).
+ADVERT_LIST_FIELDS = tuple(
+    field for field in AdvertDB.__fields__ if field != 'user_id'
+)
+
 
 @advert_router.post(
     '/',
@@ -42,23 +63,86 @@ async def create_new_advert(
     - **kind**: вид объявления (Покупка|Продажа|Услуга)
     - **price**: цена
     """
-    await check_advert_description_is_unique(
-        advert.description,
+    return await advert_crud.create(advert, user, session)
+
+
+@advert_router.post(
+    '/bulk',
+    response_model=AdvertBulkResult,
+    status_code=HTTPStatus.CREATED,
+    summary="Разместить несколько объявлений",
+    response_description="Созданные записи и ошибки по элементам",
+)
+async def create_new_adverts_bulk(
+        adverts: conlist(
+            AdvertCreate,
+            min_items=1,
+            max_items=settings.BULK_CREATE_MAX_ITEMS,
+        ),
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Разместить несколько объявлений одним запросом.
+
+    Принимает список объявлений с полями:
+    - **title**: название
+    - **description**: описание
+    - **kind**: вид объявления (Покупка|Продажа|Услуга)
+    - **price**: цена
+
+    Объявления с неуникальным описанием не создаются, для них
+    в **errors** возвращается индекс в списке и причина.
+    """
+    errors = await check_descriptions_are_unique(
+        [advert.description for advert in adverts],
         session,
     )
-    return await advert_crud.create(advert, user, session)
+    created = await advert_crud.create_many(
+        [
+            advert for index, advert in enumerate(adverts)
+            if index not in errors
+        ],
+        user,
+        session,
+    )
+    return {
+        'created': created,
+        'errors': [
+            {'index': index, 'detail': detail}
+            for index, detail in errors.items()
+        ],
+    }
 
 
 @advert_router.get(
     '/',
-    response_model=list[AdvertDB],
-    response_model_exclude={'user_id'},
+    response_model=AdvertPage,
+    response_model_exclude={'items': {'__all__': {'user_id'}}},
     status_code=HTTPStatus.OK,
     summary="Смотреть все объявления",
     response_description="Список всех объявлений",
+    responses=NOT_MODIFIED_RESPONSE,
 )
 async def get_all_adverts(
-        session: AsyncSession = Depends(get_async_session),
+        request: Request,
+        response: Response,
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
+        kind: Optional[Advert.Kind] = None,
+        price_min: Optional[int] = Query(None, ge=0),
+        price_max: Optional[int] = Query(None, ge=0),
+        user_id: Optional[int] = None,
+        title: Optional[str] = Query(None, min_length=1, max_length=100),
+        order_by: str = Query(
+            'id',
+            description='Поле сортировки: id, price, title; '
+                        'префикс "-" - по убыванию',
+        ),
+        session: AsyncSession = Depends(get_read_async_session),
 ):
     """Смотреть все объявления.
 
@@ -68,8 +152,144 @@ async def get_all_adverts(
     - **price**: цена
     - **id**: уникальный идентификатор объявления
     - **user_id**: внешний ключ пользователя, разместившего объявление
+    - **feedback_count**: число отзывов
+    - **complaint_count**: число жалоб
+
+    Фильтры (необязательные):
+    - **kind**: вид объявления
+    - **price_min**, **price_max**: диапазон цены включительно
+    - **user_id**: автор объявления
+    - **title**: начало названия
+
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+    На последней странице **next_cursor** равен null.
+
+    В ответе передаётся заголовок **ETag**. Если отправить его
+    в заголовке **If-None-Match** и страница не изменилась,
+    ответ будет 304 без тела.
+    """
+    fields = ADVERT_LIST_FIELDS if settings.FAST_JSON_RESPONSES else None
+    page = await advert_crud.get_filtered_page(
+        session,
+        kind=kind,
+        price_min=price_min,
+        price_max=price_max,
+        user_id=user_id,
+        title=title,
+        limit=limit,
+        cursor=cursor,
+        order_by=order_by,
+        fields=fields,
+    )
+    if fields is not None:
+        return fast_json_response(page, request)
+    not_modified = check_not_modified(request, response, page_etag(page))
+    if not_modified is not None:
+        return not_modified
+    return page
+
+
+@advert_router.get(
+    '/export',
+    response_class=StreamingResponse,
+    status_code=HTTPStatus.OK,
+    summary="Выгрузить все объявления",
+    response_description="Объявления в формате NDJSON или CSV",
+)
+async def export_adverts(
+        export_format: ExportFormat = Query(
+            ExportFormat.NDJSON, alias='format'
+        ),
+        session: AsyncSession = Depends(get_read_async_session),
+):
+    """Выгрузить все объявления потоком, в порядке id.
+
+    - **format**: ndjson - JSON-объект на строку, csv - таблица
+      с заголовком
+
+    Поля: **title**, **description**, **kind**, **price**, **id**.
     """
-    return await advert_crud.get_multi(session)
+    return export_response(
+        advert_crud.stream(session, ADVERT_LIST_FIELDS),
+        ADVERT_LIST_FIELDS,
+        export_format,
+        'adverts',
+    )
+
+
+@advert_router.get(
+    '/search',
+    response_model=AdvertPage,
+    response_model_exclude={'items': {'__all__': {'user_id'}}},
+    status_code=HTTPStatus.OK,
+    summary="Полнотекстовый поиск объявлений",
+    response_description="Найденные объявления",
+)
+async def search_adverts(
+        q: str = Query(..., min_length=1, max_length=200),
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_read_async_session),
+):
+    """Искать объявления по словам в названии и описании.
+
+    - **q**: поисковый запрос
+    - **title**: название
+    - **description**: описание
+    - **kind**: вид объявления (Покупка|Продажа|Услуга)
+    - **price**: цена
+    - **id**: уникальный идентификатор объявления
+
+    Результаты упорядочены по релевантности, совпадения в названии
+    весят больше совпадений в описании.
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(await advert_crud.search(
+            session, q, limit=limit, cursor=cursor, fields=ADVERT_LIST_FIELDS
+        ))
+    return await advert_crud.search(
+        session, q, limit=limit, cursor=cursor
+    )
+
+
+@advert_router.get(
+    '/most-complained',
+    response_model=AdvertPage,
+    status_code=HTTPStatus.OK,
+    summary="Объявления с наибольшим числом жалоб",
+    response_description="Объявления по убыванию числа жалоб",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_most_complained_adverts(
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Смотреть объявления, на которые есть жалобы.
+
+    Объявления упорядочены по убыванию **complaint_count**, при равном
+    числе жалоб - по убыванию id. Объявления без жалоб не выводятся.
+
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+    Число жалоб может измениться между запросами страниц, поэтому
+    объявление, у которого оно за это время изменилось, может быть
+    пропущено или выведено повторно.
+    """
+    return await advert_crud.get_most_complained_page(
+        session, limit=limit, cursor=cursor
+    )
 
 
 @advert_router.get(
@@ -78,11 +298,13 @@ async def get_all_adverts(
     status_code=HTTPStatus.OK,
     summary="Смотреть объявление по id",
     response_description="Данные объявления",
-
+    responses=NOT_MODIFIED_RESPONSE,
 )
 async def get_advert(
         advert_id: int,
-        session: AsyncSession = Depends(get_async_session),
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(get_read_async_session),
 ):
     """Смотреть одно объявление.
 
@@ -92,10 +314,21 @@ async def get_advert(
     - **price**: цена
     - **id**: уникальный идентификатор объявления
     - **user_id**: внешний ключ пользователя, разместившего объявление
+    - **feedback_count**: число отзывов
+    - **complaint_count**: число жалоб
+
+    Поддерживается **ETag** / **If-None-Match**: если объявление
+    не изменилось, ответ будет 304 без тела.
     """
-    return await advert_crud.get(
+    advert = await advert_crud.get(
         advert_id, session
     )
+    not_modified = check_not_modified(
+        request, response, object_etag(advert)
+    )
+    if not_modified is not None:
+        return not_modified
+    return advert
 
 
 @advert_router.patch(
@@ -119,19 +352,8 @@ async def partially_update_advert(
     - **kind**: вид объявления (Покупка|Продажа|Услуга)
     - **price**: цена
     """
-    advert = await advert_crud.get(
-        advert_id, session
-    )
-    await check_user_update_delete_rights(advert, user)
-    if (obj_in.description is not None
-       and obj_in.description != advert.description):
-        await check_advert_description_is_unique(
-            obj_in.description,
-            session,
-        )
-
-    return await advert_crud.update(
-        advert, obj_in, session
+    return await advert_crud.update_by_owner(
+        advert_id, obj_in, user, session
     )
 
 
@@ -156,26 +378,40 @@ async def remove_advert(
     - **price**: цена
     - **id**: уникальный идентификатор объявления
     - **user_id**: внешний ключ пользователя, разместившего объявление
+
+    Объявление сразу пропадает из выдачи вместе с отзывами и жалобами,
+    а из БД они удаляются в фоне.
     """
     advert = await advert_crud.get(
         advert_id, session
     )
     await check_user_update_delete_rights(advert, user)
-    return await advert_crud.remove(
+    advert = await advert_crud.soft_remove(
         advert, session
     )
+    advert_purger.wake()
+    return advert
 
 
 @advert_router.get(
     '/{advert_id}/feedbacks',
-    response_model=list[FeedbackDB],
+    response_model=FeedbackPage,
     status_code=HTTPStatus.OK,
     summary="Получить все отзывы на объявление",
     response_description="Список отзывов на объявление",
+    responses=NOT_MODIFIED_RESPONSE,
 )
 async def get_feedbacks_for_advert(
         advert_id: int,
-        session: AsyncSession = Depends(get_async_session),
+        request: Request,
+        response: Response,
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_read_async_session),
 ):
     """Получить все отзывы на объявление.
 
@@ -183,26 +419,44 @@ async def get_feedbacks_for_advert(
     - **advert_id**: id внешний ключ объявления
     - **id**: уникальный идентификатор отзыва
     - **user_id**: внешний ключ пользователя, оставившего отзыв
+
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+
+    Поддерживается **ETag** / **If-None-Match**: если страница
+    не изменилась, ответ будет 304 без тела.
     """
-    advert = await advert_crud.get(
-        advert_id, session
-    )
-    return await feedback_crud.get_feedbacks_for_advert(
-        advert.id,
-        session
+    page = await feedback_crud.get_feedbacks_for_advert(
+        advert_id,
+        session,
+        limit=limit,
+        cursor=cursor,
     )
+    not_modified = check_not_modified(request, response, page_etag(page))
+    if not_modified is not None:
+        return not_modified
+    return page
 
 
 @advert_router.get(
     '/{advert_id}/complaints',
-    response_model=list[FeedbackDB],
+    response_model=ComplaintPage,
     status_code=HTTPStatus.OK,
     summary="Получить все жалобы на объявление",
     response_description="Список жалоб на объявление",
+    responses=NOT_MODIFIED_RESPONSE,
     dependencies=[Depends(current_superuser)],
 )
 async def get_complaints_for_advert(
         advert_id: int,
+        request: Request,
+        response: Response,
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
         session: AsyncSession = Depends(get_async_session),
 ):
     """
@@ -212,11 +466,22 @@ async def get_complaints_for_advert(
     - **advert_id**: id внешний ключ объявления
     - **id**: уникальный идентификатор жалобы
     - **user_id**: внешний ключ пользователя, оставившего жалобу
+
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+
+    Поддерживается **ETag** / **If-None-Match**: если страница
+    не изменилась, ответ будет 304 без тела.
     """
-    advert = await advert_crud.get(
-        advert_id, session
+    page = await complaint_crud.get_complaints_for_advert(
+        advert_id,
+        session,
+        limit=limit,
+        cursor=cursor,
     )
-    return await complaint_crud.get_complaints_for_advert(
-        advert.id,
-        session
+    not_modified = check_not_modified(
+        request, response, page_etag(page), private=True
     )
+    if not_modified is not None:
+        return not_modified
+    return page
@@ -1,25 +1,38 @@
 from http import HTTPStatus
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from pydantic import conlist
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db.db import get_async_session
+from app.core.settings import settings
 from app.core.user import current_user, current_superuser
 from app.core.db.crud.advert import advert_crud
 from app.core.db.crud.complaint import complaint_crud
 from app.core.db.models import User
+from app.core.moderation import moderation_queue
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json_response
 from app.api.schemas.complaint import (
+    ComplaintBulkResult,
     ComplaintCreate,
     ComplaintDB,
+    ComplaintPage,
     ComplaintUpdate,
 )
 from app.core.validators import (
     check_user_update_delete_rights,
     check_user_create_rights,
+    check_user_create_rights_many,
 )
 
 complaint_router = APIRouter()
 
+# Поля жалобы в списках и выгрузке.
+COMPLAINT_FIELDS = tuple(ComplaintDB.__fields__)
+
 
 @complaint_router.post(
     '/',
@@ -43,18 +56,74 @@ async def create_new_complaint(
         session,
     )
     await check_user_create_rights(advert, user)
-    return await complaint_crud.create(complaint, user, session)
+    complaint = await complaint_crud.create(complaint, user, session)
+    moderation_queue.put(complaint.id)
+    return complaint
+
+
+@complaint_router.post(
+    '/bulk',
+    response_model=ComplaintBulkResult,
+    status_code=HTTPStatus.CREATED,
+    summary="Оставить несколько жалоб",
+    response_description="Созданные записи и ошибки по элементам",
+)
+async def create_new_complaints_bulk(
+        complaints: conlist(
+            ComplaintCreate,
+            min_items=1,
+            max_items=settings.BULK_CREATE_MAX_ITEMS,
+        ),
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Оставить несколько жалоб одним запросом.
+
+    Принимает список жалоб с полями:
+    - **text**: текст жалобы
+    - **advert_id**: id внешний ключ объявления
+
+    Жалобы на несуществующие или собственные объявления не создаются,
+    для них в **errors** возвращается индекс в списке и причина.
+    """
+    errors = await check_user_create_rights_many(
+        [complaint.advert_id for complaint in complaints],
+        user,
+        session,
+    )
+    created = await complaint_crud.create_many(
+        [
+            complaint for index, complaint in enumerate(complaints)
+            if index not in errors
+        ],
+        user,
+        session,
+    )
+    moderation_queue.put(*(complaint.id for complaint in created))
+    return {
+        'created': created,
+        'errors': [
+            {'index': index, 'detail': detail}
+            for index, detail in errors.items()
+        ],
+    }
 
 
 @complaint_router.get(
     '/',
-    response_model=list[ComplaintDB],
+    response_model=ComplaintPage,
     status_code=HTTPStatus.OK,
     summary="Смотреть все жалобы",
     response_description="Список всех жалоб",
     dependencies=[Depends(current_superuser)],
 )
 async def get_all_complaints(
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
         session: AsyncSession = Depends(get_async_session),
 ):
     """Смотреть все жалобы.
@@ -63,8 +132,49 @@ async def get_all_complaints(
     - **advert_id**: id внешний ключ объявления
     - **id**: уникальный идентификатор жалобы
     - **user_id**: внешний ключ пользователя, оставившего жалобу
+
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+    На последней странице **next_cursor** равен null.
     """
-    return await complaint_crud.get_multi(session)
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(await complaint_crud.get_page(
+            session, limit=limit, cursor=cursor, fields=COMPLAINT_FIELDS
+        ))
+    return await complaint_crud.get_page(
+        session, limit=limit, cursor=cursor
+    )
+
+
+@complaint_router.get(
+    '/export',
+    response_class=StreamingResponse,
+    status_code=HTTPStatus.OK,
+    summary="Выгрузить все жалобы",
+    response_description="Жалобы в формате NDJSON или CSV",
+    dependencies=[Depends(current_superuser)],
+)
+async def export_complaints(
+        export_format: ExportFormat = Query(
+            ExportFormat.NDJSON, alias='format'
+        ),
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Выгрузить все жалобы потоком, в порядке id.
+
+    - **format**: ndjson - JSON-объект на строку, csv - таблица
+      с заголовком
+
+    Поля: **text**, **id**, **user_id**, **advert_id**.
+    Подходит для таблиц любого размера: строки читаются из БД
+    и отправляются клиенту порциями.
+    """
+    return export_response(
+        complaint_crud.stream(session, COMPLAINT_FIELDS),
+        COMPLAINT_FIELDS,
+        export_format,
+        'complaints',
+    )
 
 
 @complaint_router.get(
@@ -111,13 +221,8 @@ async def partially_update_complaint(
     - **text**: текст жалобы
     - **advert_id**: id внешний ключ объявления
     """
-    complaint = await complaint_crud.get(
-        complaint_id, session
-    )
-    await check_user_update_delete_rights(complaint, user)
-
-    return await complaint_crud.update(
-        complaint, obj_in, session
+    return await complaint_crud.update_by_owner(
+        complaint_id, obj_in, user, session
     )
 
 
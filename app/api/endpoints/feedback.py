@@ -1,25 +1,37 @@
 from http import HTTPStatus
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from pydantic import conlist
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db.db import get_async_session
+from app.core.db.db import get_async_session, get_read_async_session
+from app.core.settings import settings
 from app.core.user import current_user
 from app.core.db.crud.advert import advert_crud
 from app.core.db.crud.feedback import feedback_crud
 from app.core.db.models import User
+from app.api.export import ExportFormat, export_response
+from app.api.responses import fast_json_response
 from app.api.schemas.feedback import (
+    FeedbackBulkResult,
     FeedbackCreate,
     FeedbackDB,
+    FeedbackPage,
     FeedbackUpdate,
 )
 from app.core.validators import (
     check_user_update_delete_rights,
     check_user_create_rights,
+    check_user_create_rights_many,
 )
 
 feedback_router = APIRouter()
 
+# Поля отзыва в списках и выгрузке.
+FEEDBACK_FIELDS = tuple(FeedbackDB.__fields__)
+
 
 @feedback_router.post(
     '/',
@@ -46,15 +58,68 @@ async def create_new_feedback(
     return await feedback_crud.create(feedback, user, session)
 
 
+@feedback_router.post(
+    '/bulk',
+    response_model=FeedbackBulkResult,
+    status_code=HTTPStatus.CREATED,
+    summary="Оставить несколько отзывов",
+    response_description="Созданные записи и ошибки по элементам",
+)
+async def create_new_feedbacks_bulk(
+        feedbacks: conlist(
+            FeedbackCreate,
+            min_items=1,
+            max_items=settings.BULK_CREATE_MAX_ITEMS,
+        ),
+        user: User = Depends(current_user),
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Оставить несколько отзывов одним запросом.
+
+    Принимает список отзывов с полями:
+    - **text**: текст отзыва
+    - **advert_id**: id внешний ключ объявления
+
+    Отзывы на несуществующие или собственные объявления не создаются,
+    для них в **errors** возвращается индекс в списке и причина.
+    """
+    errors = await check_user_create_rights_many(
+        [feedback.advert_id for feedback in feedbacks],
+        user,
+        session,
+    )
+    created = await feedback_crud.create_many(
+        [
+            feedback for index, feedback in enumerate(feedbacks)
+            if index not in errors
+        ],
+        user,
+        session,
+    )
+    return {
+        'created': created,
+        'errors': [
+            {'index': index, 'detail': detail}
+            for index, detail in errors.items()
+        ],
+    }
+
+
 @feedback_router.get(
     '/',
-    response_model=list[FeedbackDB],
+    response_model=FeedbackPage,
     status_code=HTTPStatus.OK,
     summary="Смотреть все отзывы",
     response_description="Список всех отзывов",
 )
 async def get_all_feedbacks(
-        session: AsyncSession = Depends(get_async_session),
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_read_async_session),
 ):
     """Смотреть все отзывы.
 
@@ -62,8 +127,46 @@ async def get_all_feedbacks(
     - **advert_id**: id внешний ключ объявления
     - **id**: уникальный идентификатор отзыва
     - **user_id**: внешний ключ пользователя, оставившего отзыв
+
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+    На последней странице **next_cursor** равен null.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return fast_json_response(await feedback_crud.get_page(
+            session, limit=limit, cursor=cursor, fields=FEEDBACK_FIELDS
+        ))
+    return await feedback_crud.get_page(
+        session, limit=limit, cursor=cursor
+    )
+
+
+@feedback_router.get(
+    '/export',
+    response_class=StreamingResponse,
+    status_code=HTTPStatus.OK,
+    summary="Выгрузить все отзывы",
+    response_description="Отзывы в формате NDJSON или CSV",
+)
+async def export_feedbacks(
+        export_format: ExportFormat = Query(
+            ExportFormat.NDJSON, alias='format'
+        ),
+        session: AsyncSession = Depends(get_read_async_session),
+):
+    """Выгрузить все отзывы потоком, в порядке id.
+
+    - **format**: ndjson - JSON-объект на строку, csv - таблица
+      с заголовком
+
+    Поля: **text**, **id**, **user_id**, **advert_id**.
     """
-    return await feedback_crud.get_multi(session)
+    return export_response(
+        feedback_crud.stream(session, FEEDBACK_FIELDS),
+        FEEDBACK_FIELDS,
+        export_format,
+        'feedbacks',
+    )
 
 
 @feedback_router.get(
@@ -76,7 +179,7 @@ async def get_all_feedbacks(
 )
 async def get_advert(
         feedback_id: int,
-        session: AsyncSession = Depends(get_async_session),
+        session: AsyncSession = Depends(get_read_async_session),
 ):
     """Смотреть один отзыв.
 
@@ -109,13 +212,8 @@ async def partially_update_advert(
     - **text**: текст отзыва
     - **advert_id**: id внешний ключ объявления
     """
-    feedback = await feedback_crud.get(
-        feedback_id, session
-    )
-    await check_user_update_delete_rights(feedback, user)
-
-    return await feedback_crud.update(
-        feedback, obj_in, session
+    return await feedback_crud.update_by_owner(
+        feedback_id, obj_in, user, session
     )
 
 
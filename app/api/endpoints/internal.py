@@ -0,0 +1,153 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends
+
+from app.core.cache import model_caches
+from app.core.db.db import engine, replica_pool_stats
+from app.core.db.pool import request_checkout_stats
+from app.core.hashing import password_pool
+from app.core.moderation import moderation_queue
+from app.core.purger import advert_purger
+from app.core.user import current_superuser
+from app.api.schemas.internal import (
+    CacheStats, DBPoolStats, ModerationQueueStats, PasswordHashingStats,
+    PurgerStats,
+)
+
+internal_router = APIRouter()
+
+
+@internal_router.get(
+    '/db-pool',
+    response_model=DBPoolStats,
+    status_code=HTTPStatus.OK,
+    summary="Состояние пула соединений с БД",
+    response_description="Метрики пула соединений",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_db_pool_stats():
+    """Смотреть состояние пула соединений с БД.
+
+    - **size**: размер пула
+    - **checked_in**: свободные соединения
+    - **checked_out**: выданные соединения
+    - **overflow**: соединения сверх размера пула
+    - **checkouts**: сколько раз выдавалось соединение
+    - **timeouts**: сколько раз соединение не дождались
+    - **wait_time_total**: суммарное время получения соединений, сек
+    - **wait_time_max**: максимальное время получения соединения, сек
+    - **requests**: обработано HTTP-запросов
+    - **requests_multi_connection**: запросы, державшие одновременно
+      больше одного соединения
+    - **max_checkouts_per_request**: наибольшее число выдач соединений
+      одному запросу
+    - **max_connections_per_request**: наибольшее число соединений,
+      которые запрос держал одновременно
+    - **replica**: пул реплики с теми же полями пула, а также
+      **failures** (ошибки подключения) и **retry_in** (секунд
+      до следующей попытки подключения); null, если реплики нет
+    """
+    return {
+        **engine.sync_engine.pool.stats(),
+        **request_checkout_stats,
+        'replica': replica_pool_stats(),
+    }
+
+
+@internal_router.get(
+    '/cache',
+    response_model=dict[str, CacheStats],
+    status_code=HTTPStatus.OK,
+    summary="Состояние кэша",
+    response_description="Метрики кэша по таблицам",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_cache_stats():
+    """Смотреть состояние кэша объектов и страниц дочерних записей.
+
+    Для каждой таблицы (счётчики - по текущему процессу):
+    - **backend**: хранилище кэша (memory|redis)
+    - **size**: число записей в кэше
+    - **max_size**: максимальное число записей
+    - **ttl**: время жизни записи, сек
+    - **hits**: попадания в кэш
+    - **misses**: промахи
+    - **evictions**: записи, вытесненные при переполнении
+    - **expirations**: записи, удалённые по истечении времени жизни
+    - **invalidations**: записи, удалённые при изменении объектов
+    - **errors**: ошибки обращения к хранилищу
+
+    Для redis размер, вытеснение и истечение записей контролирует
+    сервер, эти поля равны null.
+    """
+    return {
+        table: cache.stats() for table, cache in model_caches.items()
+    }
+
+
+@internal_router.get(
+    '/password-hashing',
+    response_model=PasswordHashingStats,
+    status_code=HTTPStatus.OK,
+    summary="Состояние пула хеширования паролей",
+    response_description="Метрики пула хеширования паролей",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_password_hashing_stats():
+    """Смотреть состояние пула хеширования и проверки паролей.
+
+    - **executor**: тип пула (thread|process)
+    - **workers**: сколько операций выполняется одновременно
+    - **max_queue**: предельная длина очереди (0 - без ограничения)
+    - **in_progress**: операции, выполняющиеся сейчас
+    - **queued**: операции, ожидающие в очереди
+    - **completed**: выполнено операций
+    - **rejected**: операции, отклонённые из-за переполнения очереди
+    - **wait_time_total**: суммарное время ожидания в очереди, сек
+    - **wait_time_max**: максимальное время ожидания в очереди, сек
+    - **run_time_total**: суммарное время выполнения, сек
+    """
+    return password_pool.stats()
+
+
+@internal_router.get(
+    '/moderation-queue',
+    response_model=ModerationQueueStats,
+    status_code=HTTPStatus.OK,
+    summary="Состояние очереди обработки жалоб",
+    response_description="Метрики фонового обработчика жалоб",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_moderation_queue_stats():
+    """Смотреть состояние фоновой обработки жалоб в текущем процессе.
+
+    - **backend**: режим очереди (memory|postgres)
+    - **running**: запущен ли обработчик
+    - **queued**: номера жалоб, ожидающие обработки
+    - **enqueued**: номеров жалоб передано обработчику
+    - **dropped**: номера, не поместившиеся в очередь (жалобы будут
+      учтены при просмотре таблицы)
+    - **processed**: жалоб учтено в очереди модерации
+    - **batches**: обработано порций
+    - **errors**: порции, обработка которых завершилась ошибкой
+    """
+    return moderation_queue.stats()
+
+
+@internal_router.get(
+    '/purger',
+    response_model=PurgerStats,
+    status_code=HTTPStatus.OK,
+    summary="Состояние очистки удалённых объявлений",
+    response_description="Метрики фоновой очистки",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_purger_stats():
+    """Смотреть состояние фоновой очистки в текущем процессе.
+
+    - **running**: запущен ли обработчик
+    - **deleted_rows**: удалено строк объявлений и дочерних записей
+    - **batches**: выполнено порций удаления
+    - **errors**: порции, завершившиеся ошибкой
+    """
+    return advert_purger.stats()
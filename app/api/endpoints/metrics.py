@@ -0,0 +1,39 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render_metrics
+
+metrics_router = APIRouter()
+
+
+class PrometheusResponse(PlainTextResponse):
+    media_type = 'text/plain; version=0.0.4'
+
+
+@metrics_router.get(
+    '/metrics',
+    response_class=PrometheusResponse,
+    status_code=HTTPStatus.OK,
+    summary="Метрики в формате Prometheus",
+    response_description="Метрики процесса",
+)
+async def get_metrics():
+    """Смотреть метрики текущего процесса в формате Prometheus.
+
+    Без аутентификации, чтобы их мог собирать Prometheus: доступ
+    к /metrics извне нужно закрыть на прокси.
+
+    - **http_requests_total**: запросы по маршрутам и кодам ответа
+    - **http_request_duration_seconds**: время обработки запроса
+    - **http_request_db_duration_seconds**: время SQL-запросов
+      за HTTP-запрос
+    - **http_request_db_statements**: число SQL-запросов за HTTP-запрос
+    - **http_request_repeated_queries_total**: запросы, повторившие
+      SQL-запрос одной формы (только при QUERY_DEBUG)
+    - **db_statements_total**: все SQL-запросы процесса, включая
+      фоновые обработчики
+    - **db_statement_duration_seconds_total**: их суммарное время
+    """
+    return render_metrics()
@@ -0,0 +1,72 @@
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.db import get_async_session
+from app.core.settings import settings
+from app.core.user import current_superuser
+from app.core.db.crud.moderation import moderation_crud
+from app.api.schemas.moderation import ModerationItemDB, ModerationPage
+
+moderation_router = APIRouter()
+
+
+@moderation_router.get(
+    '/',
+    response_model=ModerationPage,
+    status_code=HTTPStatus.OK,
+    summary="Смотреть очередь модерации",
+    response_description="Объявления с непроверенными жалобами",
+    dependencies=[Depends(current_superuser)],
+)
+async def get_moderation_queue(
+        flagged: Optional[bool] = None,
+        limit: int = Query(
+            settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = None,
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Смотреть объявления с непроверенными жалобами.
+
+    - **advert_id**: id объявления
+    - **pending_count**: жалобы с последней проверки
+    - **last_complaint_id**: id последней учтённой жалобы
+    - **flagged_at**: когда число жалоб достигло порога (null - не достигло)
+
+    Фильтр **flagged**: true - только помеченные, false - только
+    непомеченные объявления.
+    Очередь упорядочена по убыванию **pending_count** и заполняется
+    в фоне: новая жалоба появляется в ней с небольшой задержкой.
+    Выдача постраничная: в ответе **next_cursor** - курсор следующей
+    страницы, который нужно передать в параметре **cursor**.
+    """
+    return await moderation_crud.get_queue_page(
+        session, flagged=flagged, limit=limit, cursor=cursor
+    )
+
+
+@moderation_router.delete(
+    '/{advert_id}',
+    response_model=ModerationItemDB,
+    status_code=HTTPStatus.OK,
+    summary="Отметить жалобы на объявление проверенными",
+    response_description="Удалённая из очереди запись",
+    dependencies=[Depends(current_superuser)],
+)
+async def resolve_advert_complaints(
+        advert_id: int,
+        session: AsyncSession = Depends(get_async_session),
+):
+    """Убрать объявление из очереди модерации.
+
+    Жалобы, поступившие после этого, вернут объявление в очередь.
+    """
+    moderation_item = await moderation_crud.get_by_advert(
+        advert_id, session
+    )
+    return await moderation_crud.remove(moderation_item, session)
@@ -0,0 +1,84 @@
+import csv
+import enum
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+
+class ExportFormat(str, enum.Enum):
+    """Формат выгрузки."""
+
+    NDJSON = 'ndjson'
+    CSV = 'csv'
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: 'application/x-ndjson',
+    ExportFormat.CSV: 'text/csv; charset=utf-8',
+}
+
+
+def _plain(value: Any) -> Any:
+    """Приводит значение колонки к типу, понятному JSON и CSV."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def _ndjson_chunks(
+        chunks: AsyncIterator[list],
+        fields: tuple[str, ...],
+) -> AsyncIterator[str]:
+    """По одному JSON-объекту на строку, порциями строк выборки."""
+    async for rows in chunks:
+        yield ''.join(
+            json.dumps(
+                dict(zip(fields, map(_plain, row))), ensure_ascii=False
+            ) + '\n'
+            for row in rows
+        )
+
+
+async def _csv_chunks(
+        chunks: AsyncIterator[list],
+        fields: tuple[str, ...],
+) -> AsyncIterator[str]:
+    """CSV с заголовком из имён полей, порциями строк выборки."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([map(_plain, row) for row in rows])
+        yield buffer.getvalue()
+
+
+def export_response(
+        chunks: AsyncIterator[list],
+        fields: tuple[str, ...],
+        export_format: ExportFormat,
+        filename: str,
+) -> StreamingResponse:
+    """
+    Ответ, отдающий строки выборки по мере чтения из БД.
+    В памяти одновременно находится только одна порция строк.
+    """
+    if export_format == ExportFormat.CSV:
+        content = _csv_chunks(chunks, fields)
+    else:
+        content = _ndjson_chunks(chunks, fields)
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition':
+                f'attachment; filename="{filename}.{export_format.value}"',
+        },
+    )
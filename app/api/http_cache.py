@@ -0,0 +1,80 @@
+import hashlib
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.core.settings import settings
+
+# Описание ответа 304 для документации эндпоинтов с ETag.
+NOT_MODIFIED_RESPONSE = {
+    HTTPStatus.NOT_MODIFIED.value: {
+        'description': 'Данные не изменились с указанной в '
+                       'If-None-Match версии',
+    },
+}
+
+
+def make_etag(*parts) -> str:
+    """
+    Слабый ETag из версий записей.
+    Совпадает, пока не меняется ни одна из частей.
+    """
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def content_etag(body: bytes) -> str:
+    """Слабый ETag по содержимому готового ответа."""
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def object_etag(db_obj) -> str:
+    """ETag объекта по его id и времени изменения."""
+    return make_etag(db_obj.id, db_obj.updated_at.isoformat())
+
+
+def page_etag(page: dict) -> str:
+    """ETag страницы по id и времени изменения записей на ней."""
+    return make_etag(
+        [(db_obj.id, db_obj.updated_at.isoformat())
+         for db_obj in page['items']],
+        page['next_cursor'],
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет, есть ли ETag среди перечисленных в If-None-Match."""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Сравнение слабое: префикс W/ не учитывается.
+    return etag.removeprefix('W/') in (
+        tag.strip().removeprefix('W/') for tag in if_none_match.split(',')
+    )
+
+
+def check_not_modified(
+        request: Request,
+        response: Response,
+        etag: str,
+        private: bool = False,
+) -> Optional[Response]:
+    """
+    Выставляет ETag и Cache-Control в ответ эндпоинта.
+    Если клиент уже имеет эту версию данных, возвращает ответ 304
+    без тела, который эндпоинт должен отдать вместо данных.
+    """
+    headers = {
+        'ETag': etag,
+        'Cache-Control': (
+            f'{"private" if private else "public"}, '
+            f'max-age={settings.HTTP_CACHE_MAX_AGE}, must-revalidate'
+        ),
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,29 @@
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+from app.api.http_cache import check_not_modified, content_etag
+
+
+def fast_json_response(
+        content: dict,
+        request: Optional[Request] = None,
+        private: bool = False,
+) -> Response:
+    """
+    Ответ, сериализованный orjson напрямую, без проверки схемой
+    response_model и jsonable_encoder. Содержимое должно уже
+    соответствовать схеме: схема остаётся только в документации.
+    Если передан request, в ответ добавляется ETag по содержимому,
+    и при совпадении с If-None-Match возвращается 304.
+    """
+    response = ORJSONResponse(content)
+    if request is None:
+        return response
+    not_modified = check_not_modified(
+        request, response, content_etag(response.body), private=private
+    )
+    if not_modified is not None:
+        return not_modified
+    return response
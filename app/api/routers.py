@@ -3,6 +3,9 @@ from fastapi import APIRouter
 from app.api.endpoints.advert import advert_router
 from app.api.endpoints.complaint import complaint_router
 from app.api.endpoints.feedback import feedback_router
+from app.api.endpoints.internal import internal_router
+from app.api.endpoints.metrics import metrics_router
+from app.api.endpoints.moderation import moderation_router
 from app.api.endpoints.user import user_router
 
 main_router = APIRouter()
@@ -22,4 +25,18 @@ main_router.include_router(
     prefix='/feedbacks',
     tags=['Feedback'],
 )
+main_router.include_router(
+    moderation_router,
+    prefix='/moderation',
+    tags=['Moderation'],
+)
+main_router.include_router(
+    internal_router,
+    prefix='/internal',
+    tags=['Internal'],
+)
+main_router.include_router(
+    metrics_router,
+    tags=['Internal'],
+)
 main_router.include_router(user_router)
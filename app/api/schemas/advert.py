@@ -2,6 +2,7 @@ from typing import Optional
 
 from pydantic import BaseModel, Extra, Field, PositiveInt, validator
 
+from app.api.schemas.bulk import BulkItemError
 from app.core.db.models import Advert
 # from app.schemas.feedback import FeedbackDB
 
@@ -51,7 +52,21 @@ class AdvertDB(AdvertBase):
     """Схема для получения объявления."""
     id: int
     user_id: Optional[int]
+    feedback_count: int
+    complaint_count: int
     # feedbacks: Optional[list[FeedbackDB]]
 
     class Config:
         orm_mode = True
+
+
+class AdvertPage(BaseModel):
+    """Схема для страницы объявлений."""
+    items: list[AdvertDB]
+    next_cursor: Optional[str]
+
+
+class AdvertBulkResult(BaseModel):
+    """Схема для результата пакетного создания объявлений."""
+    created: list[AdvertDB]
+    errors: list[BulkItemError]
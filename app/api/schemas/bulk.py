@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class BulkItemError(BaseModel):
+    """Схема ошибки для элемента пакетного запроса."""
+    index: int
+    detail: str
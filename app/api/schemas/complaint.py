@@ -2,6 +2,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Extra, Field, validator
 
+from app.api.schemas.bulk import BulkItemError
+
 
 class ComplaintBase(BaseModel):
     """Базовая схема для жалобы."""
@@ -39,3 +41,15 @@ class ComplaintDB(ComplaintBase):
 
     class Config:
         orm_mode = True
+
+
+class ComplaintPage(BaseModel):
+    """Схема для страницы жалоб."""
+    items: list[ComplaintDB]
+    next_cursor: Optional[str]
+
+
+class ComplaintBulkResult(BaseModel):
+    """Схема для результата пакетного создания жалоб."""
+    created: list[ComplaintDB]
+    errors: list[BulkItemError]
@@ -2,6 +2,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Extra, Field, validator
 
+from app.api.schemas.bulk import BulkItemError
+
 
 class FeedbackBase(BaseModel):
     """Базовая схема для отзыва."""
@@ -39,3 +41,15 @@ class FeedbackDB(FeedbackBase):
 
     class Config:
         orm_mode = True
+
+
+class FeedbackPage(BaseModel):
+    """Схема для страницы отзывов."""
+    items: list[FeedbackDB]
+    next_cursor: Optional[str]
+
+
+class FeedbackBulkResult(BaseModel):
+    """Схема для результата пакетного создания отзывов."""
+    created: list[FeedbackDB]
+    errors: list[BulkItemError]
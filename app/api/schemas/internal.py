@@ -0,0 +1,78 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PoolStats(BaseModel):
+    """Схема для состояния пула соединений."""
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time_total: float
+    wait_time_max: float
+
+
+class ReplicaPoolStats(PoolStats):
+    """Схема для состояния пула соединений с репликой."""
+    failures: int
+    retry_in: float
+
+
+class DBPoolStats(PoolStats):
+    """Схема для состояния пула соединений с БД."""
+    requests: int
+    requests_multi_connection: int
+    max_checkouts_per_request: int
+    max_connections_per_request: int
+    replica: Optional[ReplicaPoolStats]
+
+
+class CacheStats(BaseModel):
+    """Схема для состояния кэша объектов модели."""
+    backend: str
+    size: Optional[int]
+    max_size: Optional[int]
+    ttl: float
+    hits: int
+    misses: int
+    evictions: Optional[int]
+    expirations: Optional[int]
+    invalidations: int
+    errors: int
+
+
+class PasswordHashingStats(BaseModel):
+    """Схема для состояния пула хеширования паролей."""
+    executor: str
+    workers: int
+    max_queue: int
+    in_progress: int
+    queued: int
+    completed: int
+    rejected: int
+    wait_time_total: float
+    wait_time_max: float
+    run_time_total: float
+
+
+class ModerationQueueStats(BaseModel):
+    """Схема для состояния очереди обработки жалоб."""
+    backend: str
+    running: bool
+    queued: int
+    enqueued: int
+    dropped: int
+    processed: int
+    batches: int
+    errors: int
+
+
+class PurgerStats(BaseModel):
+    """Схема для состояния очистки удалённых объявлений."""
+    running: bool
+    deleted_rows: int
+    batches: int
+    errors: int
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ModerationItemDB(BaseModel):
+    """Схема для объявления в очереди модерации."""
+    id: int
+    advert_id: int
+    pending_count: int
+    last_complaint_id: int
+    flagged_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class ModerationPage(BaseModel):
+    """Схема для страницы очереди модерации."""
+    items: list[ModerationItemDB]
+    next_cursor: Optional[str]
@@ -0,0 +1,260 @@
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    Базовый класс кэша.
+    Ключи - строки, значения - данные JSON (словари, списки, строки,
+    числа, bool, None) и datetime. Отсутствие значения в кэше
+    обозначается None.
+    """
+
+    backend = ''
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Возвращает значение по ключу или None, если его нет в кэше."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        """Сохраняет значение на время ttl (ttl 0 - не сохраняет)."""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Удаляет записи из кэша."""
+
+    async def get_version(self, key: str) -> str:
+        """
+        Версия данных под ключом key: токен, который входит в ключи
+        их записей в кэше. При изменении данных удаляется запись
+        version:{key}, и следующее чтение получает новую версию.
+        Версию нужно получить до чтения из БД: тогда результат чтения,
+        начатого до изменения, сохраняется под старой версией, даже
+        если запись в кэш выполнена после сброса, и больше не читается.
+        """
+        version_key = f'version:{key}'
+        version = await self.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            await self.set(version_key, version)
+        return version
+
+    def stats(self) -> dict:
+        """Счётчики обращений к кэшу в текущем процессе."""
+        return {
+            'backend': self.backend,
+            'size': None,
+            'max_size': None,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': None,
+            'expirations': None,
+            'invalidations': self.invalidations,
+            'errors': self.errors,
+        }
+
+
+class LocalCache(CacheBackend):
+    """
+    LRU-кэш в памяти процесса с ограниченным временем жизни записей.
+    При переполнении вытесняется запись, к которой дольше всего
+    не обращались. Размер 0 или ttl 0 отключают кэш.
+    Каждый процесс хранит свою копию, поэтому изменения, сделанные
+    в другом процессе, видны здесь только по истечении ttl.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_size: int, ttl: float):
+        super().__init__(ttl)
+        self.max_size = max_size
+        self._data: OrderedDict = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Очищает кэш."""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Сериализует значение кэша в JSON. datetime сохраняется
+    как {"__datetime__": ISO 8601}, перечисления на основе str -
+    своими значениями.
+    """
+    return json.dumps(
+        value, default=encode_special, ensure_ascii=False
+    ).encode()
+
+
+def encode_special(value: Any) -> dict:
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f'Значение {value!r} нельзя сохранить в кэше')
+
+
+def decode_value(raw: bytes) -> Any:
+    """Восстанавливает значение кэша из JSON (см. encode_value)."""
+    return json.loads(raw, object_hook=decode_special)
+
+
+def decode_special(obj: dict) -> Any:
+    if obj.keys() == {'__datetime__'}:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+class RedisCache(CacheBackend):
+    """
+    Кэш в Redis (или другом сервере с протоколом Redis), общий
+    для всех процессов приложения. Удаление записи сразу видно
+    во всех процессах. Вытеснение и истечение записей выполняет
+    сам сервер. Если сервер недоступен, кэш ведёт себя как пустой.
+    Значения хранятся в JSON (см. encode_value): данные из Redis
+    не исполняются при чтении, в отличие от pickle.
+    """
+
+    backend = 'redis'
+
+    def __init__(self, client: aioredis.Redis, prefix: str, ttl: float):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self.client.get(f'{self.prefix}:{key}')
+        except RedisError as error:
+            self._log_error(error)
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            value = decode_value(value)
+        except ValueError as error:
+            # Например, запись в прежнем формате (pickle).
+            self._log_error(error)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        try:
+            await self.client.set(
+                f'{self.prefix}:{key}',
+                encode_value(value),
+                px=int(self.ttl * 1000),
+            )
+        except RedisError as error:
+            self._log_error(error)
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            deleted = await self.client.delete(
+                *(f'{self.prefix}:{key}' for key in keys)
+            )
+        except RedisError as error:
+            self._log_error(error)
+            return
+        self.invalidations += deleted
+
+    def _log_error(self, error: Exception) -> None:
+        self.errors += 1
+        logger.warning('Ошибка обращения к кэшу %s: %s', self.prefix, error)
+
+
+# Клиент Redis общий для кэшей всех моделей.
+redis_client: Optional[aioredis.Redis] = None
+
+# Кэши объектов по имени таблицы модели.
+model_caches: dict[str, CacheBackend] = {}
+
+
+def create_cache(
+        name: str,
+        max_size: Optional[int] = None,
+        ttl: Optional[float] = None,
+) -> CacheBackend:
+    """
+    Создаёт кэш для таблицы name в хранилище из настроек
+    и регистрирует его в model_caches.
+    """
+    global redis_client
+    ttl = settings.CACHE_TTL if ttl is None else ttl
+    if settings.CACHE_BACKEND == 'redis':
+        if redis_client is None:
+            redis_client = aioredis.from_url(settings.CACHE_REDIS_URL)
+        cache = RedisCache(redis_client, f'cache:{name}', ttl)
+    else:
+        cache = LocalCache(
+            settings.CACHE_SIZE if max_size is None else max_size, ttl
+        )
+    model_caches[name] = cache
+    return cache
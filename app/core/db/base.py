@@ -1,3 +1,4 @@
 """Импорты класса Base и всех моделей для Alembic."""
 from app.core.db.db import Base  # noqa
 from app.core.db.models import Advert, Complaint, Feedback, User  # noqa
+from app.core.db import fulltext  # noqa
@@ -1,9 +1,250 @@
+from http import HTTPStatus
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.core.db.crud.base import CRUDBase
-from app.core.db.models import Advert
+from app.core.db.crud.complaint import complaint_crud
+from app.core.db.crud.feedback import feedback_crud
+from app.core.db.crud.moderation import moderation_crud
+from app.core.db.fulltext import ranked_advert_ids
+from app.core.db.models import Advert, User, description_digest, utc_now
 
 
 class CRUDAdvert(CRUDBase):
-    pass
+    sortable_fields = ('id', 'price', 'title')
+    # CRUD моделей, строки которых очищаются вместе с удалённым
+    # объявлением.
+    purged_children = (feedback_crud, complaint_crud, moderation_crud)
+
+    async def create(
+            self,
+            obj_in,
+            user: User,
+            session: AsyncSession,
+    ):
+        """
+        Создаёт объявление.
+        Уникальность описания проверяет индекс по его хешу.
+        """
+        try:
+            return await super().create(obj_in, user, session)
+        except IntegrityError as error:
+            await self._handle_integrity_error(error, session)
+
+    async def create_many(
+            self,
+            objs_in: list,
+            user: User,
+            session: AsyncSession,
+    ) -> list:
+        """
+        Создаёт объявления одним запросом.
+        Уникальность описаний проверяет индекс по их хешам.
+        """
+        try:
+            return await super().create_many(objs_in, user, session)
+        except IntegrityError as error:
+            await self._handle_integrity_error(error, session)
+
+    def _create_values(self, obj_in, user: User) -> dict:
+        """Значения колонок нового объявления вместе с хешем описания."""
+        obj_in_data = super()._create_values(obj_in, user)
+        obj_in_data['description_hash'] = description_digest(
+            obj_in_data['description']
+        )
+        return obj_in_data
+
+    def _update_values(self, obj_in) -> dict:
+        """Значения изменяемых колонок объявления вместе с хешем описания."""
+        update_data = super()._update_values(obj_in)
+        if 'description' in update_data:
+            update_data['description_hash'] = description_digest(
+                update_data['description']
+            )
+        return update_data
+
+    async def update(
+            self,
+            db_obj,
+            obj_in,
+            session: AsyncSession,
+    ):
+        """
+        Обновляет объявление.
+        Уникальность описания проверяет индекс по его хешу.
+        """
+        try:
+            return await super().update(db_obj, obj_in, session)
+        except IntegrityError as error:
+            await self._handle_integrity_error(error, session)
+
+    async def update_by_owner(
+            self,
+            obj_id: int,
+            obj_in,
+            user: User,
+            session: AsyncSession,
+    ):
+        """
+        Обновляет объявление автора одним запросом.
+        Уникальность описания проверяет индекс по его хешу.
+        """
+        try:
+            return await super().update_by_owner(
+                obj_id, obj_in, user, session
+            )
+        except IntegrityError as error:
+            await self._handle_integrity_error(error, session)
+
+    @staticmethod
+    async def _handle_integrity_error(
+            error: IntegrityError,
+            session: AsyncSession,
+    ):
+        """Превращает нарушение уникальности описания в ошибку 422."""
+        await session.rollback()
+        if 'description_hash' not in str(error.orig):
+            raise error
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Придумайте уникальное описание объявления!',
+        )
+
+    async def get_filtered_page(
+            self,
+            session: AsyncSession,
+            kind: Optional[Advert.Kind] = None,
+            price_min: Optional[int] = None,
+            price_max: Optional[int] = None,
+            user_id: Optional[int] = None,
+            title: Optional[str] = None,
+            **page_params,
+    ) -> dict:
+        """
+        Возвращает страницу объявлений, отфильтрованных по виду,
+        диапазону цены, автору и началу названия.
+        """
+        where = []
+        if kind is not None:
+            where.append(self.model.kind == kind)
+        if price_min is not None:
+            where.append(self.model.price >= price_min)
+        if price_max is not None:
+            where.append(self.model.price <= price_max)
+        if user_id is not None:
+            where.append(self.model.user_id == user_id)
+        if title is not None:
+            where.append(self.model.title.startswith(title, autoescape=True))
+        return await self.get_page(session, where=tuple(where), **page_params)
+
+    async def search(
+            self,
+            session: AsyncSession,
+            search_text: str,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+            fields: Optional[tuple[str, ...]] = None,
+    ) -> dict:
+        """
+        Возвращает страницу объявлений, найденных полнотекстовым поиском
+        по названию и описанию, в порядке убывания релевантности.
+        """
+        ranked = ranked_advert_ids(search_text, session.bind.dialect.name)
+        query = self._select(fields).join(
+            ranked, ranked.c.id == self.model.id
+        )
+        return await self._get_keyset_page(
+            session, query, ranked.c.score, 'rank', limit, cursor, fields
+        )
+
+    async def get_most_complained_page(
+            self,
+            session: AsyncSession,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Возвращает страницу объявлений с жалобами по убыванию их числа.
+        Выборка идёт по частичному индексу ix_advert_complaint_count_id
+        без подсчёта строк таблицы жалоб.
+        Пагинация приблизительная: курсор хранит complaint_count
+        последнего объявления страницы, а число жалоб меняется между
+        запросами страниц. Объявление, у которого оно за это время
+        изменилось, может быть пропущено или выведено повторно.
+        """
+        return await self._get_keyset_page(
+            session,
+            self._select().where(self.model.complaint_count > 0),
+            self.model.complaint_count,
+            '-complaint_count',
+            limit,
+            cursor,
+        )
+
+    async def soft_remove(
+            self,
+            db_obj,
+            session: AsyncSession,
+    ):
+        """
+        Помечает объявление удалённым одним UPDATE ... RETURNING.
+        Время запроса не зависит от числа отзывов и жалоб: их вместе
+        с самим объявлением удаляет фоновый обработчик (purge_deleted).
+        Они перестают быть видны сразу: запросы к БД отсекают их
+        по deleted_at родителя, по id они не кэшируются, а их страницы
+        пропадают из кэша вместе с версией детей объявления.
+        """
+        db_obj = await self._update_returning(
+            session,
+            (self.model.id == db_obj.id,),
+            {'deleted_at': utc_now()},
+        )
+        await session.commit()
+        await self.invalidate(db_obj)
+        return db_obj
+
+    async def purge_deleted(
+            self,
+            session: AsyncSession,
+            batch_size: int,
+    ) -> int:
+        """
+        Удаляет из БД порцию строк одного удалённого объявления:
+        до batch_size дочерних записей одной модели, а когда их
+        не осталось - само объявление. Каждая порция - отдельная
+        короткая транзакция: дети удаляются порциями, а не каскадом
+        БД, чтобы не держать блокировки на всех строках сразу.
+        Объявление блокируется через
+        FOR UPDATE SKIP LOCKED, поэтому несколько обработчиков
+        очищают разные объявления.
+        Возвращает число удалённых строк, 0 - если очищать нечего.
+        """
+        advert_id = await session.scalar(
+            select(self.model.id)
+            .where(self.model.deleted_at.isnot(None))
+            .order_by(self.model.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        if advert_id is None:
+            return 0
+        for child_crud in self.purged_children:
+            child_model = child_crud.model
+            child_ids = await session.execute(
+                select(child_model.id)
+                .where(child_model.advert_id == advert_id)
+                .limit(batch_size)
+            )
+            child_ids = child_ids.scalars().all()
+            if child_ids:
+                return len(
+                    await child_crud.remove_many(child_ids, session)
+                )
+        return len(await self.remove_many([advert_id], session))
 
 
 advert_crud = CRUDAdvert(Advert)
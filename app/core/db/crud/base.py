@@ -1,19 +1,158 @@
+import base64
+import binascii
+import json
+from collections import Counter, defaultdict
 from http import HTTPStatus
+from typing import Any, AsyncIterator, Optional
 
 from fastapi import HTTPException
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer, and_, any_, bindparam, delete, exists, insert, or_, select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from app.core.db.db import Base
+from app.core.cache import create_cache, model_caches
+from app.core.db.db import Base, is_replica_session
 from app.core.db.models import User
+from app.core.settings import settings
+from app.core.validators import check_user_update_delete_rights
+
+
+def encode_cursor(order_by: str, value: Any, obj_id: int) -> str:
+    """Упаковать позицию последней записи страницы в непрозрачный курсор."""
+    raw = json.dumps([order_by, value, obj_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(
+        cursor: str,
+        order_by: str,
+        value_type: Optional[type] = None,
+) -> tuple[Any, int]:
+    """
+    Распаковать курсор.
+    Если курсор повреждён, выдан для другой сортировки или значение
+    поля сортировки не того типа (`value_type`), бросает ошибку.
+    """
+    try:
+        cursor_order_by, value, obj_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+    except (ValueError, TypeError, binascii.Error):
+        cursor_order_by = obj_id = value = None
+    if (
+        cursor_order_by != order_by or
+        not is_cursor_value(obj_id, int) or
+        value_type is not None and not is_cursor_value(value, value_type)
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Некорректный курсор пагинации!',
+        )
+    return value, obj_id
+
+
+def is_cursor_value(value: Any, value_type: type) -> bool:
+    """Подходит ли значение из курсора для поля с типом `value_type`."""
+    if isinstance(value, bool) and value_type is not bool:
+        return False
+    if value_type is float:
+        # JSON не различает 1 и 1.0.
+        value_type = (int, float)
+    return isinstance(value, value_type)
+
+
+def column_python_type(column) -> Optional[type]:
+    """Тип Python значений колонки или None, если он неизвестен."""
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def raise_not_found(model: Base) -> None:
+    """Бросает ошибку 404 для объекта модели."""
+    raise HTTPException(
+        status_code=HTTPStatus.NOT_FOUND,
+        detail=f'Объект {model.__tablename__.title()} не найден!'
+    )
+
+
+def live_where(model: Base) -> tuple:
+    """
+    Условия, скрывающие удалённые (deleted_at) объекты модели
+    и объекты, родитель которых удалён, но ещё не очищен.
+    """
+    where = []
+    table = model.__table__
+    if 'deleted_at' in table.c:
+        where.append(table.c.deleted_at.is_(None))
+    for foreign_key in soft_deleted_parents(model):
+        parent = foreign_key.column.table.alias()
+        where.append(~exists().where(
+            parent.c.id == foreign_key.parent,
+            parent.c.deleted_at.isnot(None),
+        ))
+    return tuple(where)
+
+
+def soft_deleted_parents(model: Base) -> list:
+    """Внешние ключи модели на родителей, удаляемых через deleted_at."""
+    return [
+        foreign_key for foreign_key in model.__table__.foreign_keys
+        if 'deleted_at' in foreign_key.column.table.c
+    ]
+
+
+def add_cache_keys(keys: defaultdict, table, row) -> None:
+    """
+    Добавляет в keys (имя таблицы -> ключи) ключи версий строки таблицы
+    и её родителей. Версия строки входит в ключи кэша самой строки
+    и страниц её детей.
+    """
+    keys[table.name].add(f'version:{row.id}')
+    for foreign_key in table.foreign_keys:
+        parent_id = getattr(row, foreign_key.parent.key)
+        if parent_id is not None:
+            keys[foreign_key.column.table.name].add(f'version:{parent_id}')
+
+
+async def delete_cache_keys(keys: dict) -> None:
+    """Удаляет ключи из кэшей моделей по именам таблиц."""
+    for table, table_keys in keys.items():
+        cache = model_caches.get(table)
+        if cache is not None:
+            await cache.delete(*table_keys)
 
 
 class CRUDBase:
     """Базовый класс для типовых операций CRUD."""
 
-    def __init__(self, model: Base):
+    # Поля, по которым разрешена сортировка при постраничной выборке.
+    sortable_fields: tuple[str, ...] = ('id',)
+
+    def __init__(
+            self,
+            model: Base,
+            cache_size: Optional[int] = None,
+            cache_ttl: Optional[float] = None,
+            parent_counter=None,
+    ):
         self.model = model
+        self.live_where = live_where(model)
+        # Объекты, родитель которых удаляется через deleted_at, не
+        # кэшируются по id: пометка родителя не сбрасывает их в кэше,
+        # и объект из кэша оставался бы виден после удаления родителя.
+        self.cache_by_id = not soft_deleted_parents(model)
+        # Колонка родителя со счётчиком дочерних объектов модели,
+        # например Advert.feedback_count.
+        self.parent_counter = parent_counter
+        self.cache = create_cache(
+            model.__tablename__, max_size=cache_size, ttl=cache_ttl
+        )
 
     async def get(
             self,
@@ -22,44 +161,364 @@ class CRUDBase:
     ):
         """
         Возвращает объект по id.
-        Если объект не найден, бросает ошибку.
+        Сначала объект ищется в кэше (если модель кэшируется по id),
+        затем в БД. Если объект не найден, бросает ошибку.
+        Объект, прочитанный из реплики, в кэш не сохраняется.
         """
+        if self.cache_by_id:
+            version = await self.cache.get_version(str(obj_id))
+            key = f'{obj_id}:{version}'
+            values = await self.cache.get(key)
+            if values is not None:
+                return await self._from_cache(values, session)
         db_obj = await session.execute(
-            select(self.model).where(
+            self._select().where(
                 self.model.id == obj_id
             )
         )
         db_obj = db_obj.scalars().first()
         if db_obj is None:
-            raise HTTPException(
-                status_code=HTTPStatus.NOT_FOUND,
-                detail=f'Объект {self.model.__tablename__.title()} не найден!'
-            )
+            raise_not_found(self.model)
+        if self.cache_by_id and not is_replica_session(session):
+            await self.cache.set(key, self._cache_values(db_obj))
         return db_obj
 
+    def _cache_values(self, db_obj) -> dict:
+        """Значения загруженных колонок объекта для хранения в кэше."""
+        return {
+            prop.key: getattr(db_obj, prop.key)
+            for prop in self.model.__mapper__.column_attrs
+            if not prop.deferred
+        }
+
+    async def _from_cache(self, values: dict, session: AsyncSession):
+        """
+        Восстанавливает объект из кэша и присоединяет его к сессии
+        без запроса к БД, чтобы его можно было изменять и удалять.
+        """
+        db_obj = self.model(**values)
+        make_transient_to_detached(db_obj)
+        return await session.merge(db_obj, load=False)
+
+    async def invalidate(self, *db_objs) -> None:
+        """
+        Сбрасывает версии объектов и их родителей: записи объектов
+        и страницы их дочерних записей перестают читаться из кэша.
+        Родители сбрасываются вместе с детьми: в них хранятся
+        счётчики дочерних записей.
+        """
+        keys = defaultdict(set)
+        for db_obj in db_objs:
+            add_cache_keys(keys, db_obj.__table__, db_obj)
+        await delete_cache_keys(keys)
+
+    async def _children_version(
+            self,
+            parent_model: Base,
+            parent_id: int,
+    ) -> str:
+        """
+        Версия дочерних записей родителя. Входит в ключи кэша страниц
+        и меняется при любом изменении детей или самого родителя,
+        поэтому устаревшие страницы перестают читаться.
+        """
+        parent_cache = model_caches[parent_model.__tablename__]
+        return await parent_cache.get_version(str(parent_id))
+
+    async def _count_in_parents(
+            self,
+            session: AsyncSession,
+            db_objs: list,
+            sign: int,
+    ) -> None:
+        """
+        Изменяет счётчики дочерних объектов у родителей на число
+        добавленных (sign=1) или удалённых (sign=-1) объектов.
+        Выполняется в транзакции изменения, одним UPDATE на каждое
+        различное приращение.
+        """
+        if self.parent_counter is None or not db_objs:
+            return
+        parent_model = self.parent_counter.class_
+        parent_fk = f'{parent_model.__tablename__}_id'
+        counts = Counter(
+            getattr(db_obj, parent_fk) for db_obj in db_objs
+            if getattr(db_obj, parent_fk) is not None
+        )
+        parent_ids_by_count = defaultdict(list)
+        for parent_id, count in counts.items():
+            parent_ids_by_count[count].append(parent_id)
+        for count, parent_ids in parent_ids_by_count.items():
+            await session.execute(
+                update(parent_model)
+                .where(parent_model.id.in_(sorted(parent_ids)))
+                .values({
+                    self.parent_counter: self.parent_counter + sign * count
+                })
+                .execution_options(synchronize_session=False)
+            )
+
     async def get_multi(
             self,
             session: AsyncSession
     ):
         """Возвращает все объекты из БД."""
-        db_objs = await session.execute(select(self.model))
+        db_objs = await session.execute(self._select())
         return db_objs.scalars().all()
 
+    async def stream(
+            self,
+            session: AsyncSession,
+            fields: tuple[str, ...],
+            where: tuple = (),
+    ) -> AsyncIterator[list]:
+        """
+        Выгружает значения полей всех объектов, упорядоченных по id,
+        порциями по EXPORT_CHUNK_SIZE строк.
+        Строки читаются через серверный курсор, объекты ORM
+        не создаются, поэтому память не зависит от размера таблицы.
+        """
+        result = await session.stream(
+            self._select(fields)
+            .where(*where)
+            .order_by(self.model.id)
+        )
+        async for rows in result.partitions(settings.EXPORT_CHUNK_SIZE):
+            yield rows
+
+    async def get_page(
+            self,
+            session: AsyncSession,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+            order_by: str = 'id',
+            where: tuple = (),
+            fields: Optional[tuple[str, ...]] = None,
+    ) -> dict:
+        """
+        Возвращает страницу объектов (keyset-пагинация).
+        Сортировка по полю `order_by` (с префиксом `-` - по убыванию)
+        и по id для однозначности порядка. Курсор следующей страницы
+        кодирует значения этих полей у последней записи, поэтому
+        стоимость запроса не зависит от номера страницы.
+        Если переданы `fields`, вместо объектов возвращаются словари
+        значений этих полей (среди них должен быть id).
+        """
+        field = order_by.removeprefix('-')
+        if field not in self.sortable_fields:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail=f'Сортировка по полю {field} недоступна!',
+            )
+        return await self._get_keyset_page(
+            session,
+            self._select(fields).where(*where),
+            getattr(self.model, field),
+            order_by,
+            limit,
+            cursor,
+            fields,
+        )
+
+    def _select(self, fields: Optional[tuple[str, ...]] = None):
+        """
+        Запрос неудалённых объектов модели или, если переданы `fields`,
+        только значений этих полей без создания объектов ORM.
+        """
+        if fields is None:
+            query = select(self.model)
+        else:
+            query = select(
+                *(getattr(self.model, field) for field in fields)
+            )
+        return query.where(*self.live_where)
+
+    async def get_page_by_parent(
+            self,
+            session: AsyncSession,
+            parent_model: Base,
+            parent_id: int,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Возвращает страницу дочерних объектов родителя, упорядоченных по id.
+        Существование родителя проверяется в том же запросе: родитель
+        присоединяется к детям через LEFT JOIN, и пустой результат
+        означает, что родителя нет или он удалён. В этом случае бросает
+        ошибку. Страница, прочитанная из реплики, в кэш не сохраняется.
+        """
+        limit = min(
+            limit or settings.PAGINATION_DEFAULT_LIMIT,
+            settings.PAGINATION_MAX_LIMIT,
+        )
+        version = await self._children_version(parent_model, parent_id)
+        page_key = (
+            f'{parent_model.__tablename__}:{parent_id}:{version}'
+            f':{limit}:{cursor}'
+        )
+        page = await self.cache.get(page_key)
+        if page is not None:
+            return {
+                'items': [self.model(**values) for values in page['items']],
+                'next_cursor': page['next_cursor'],
+            }
+        parent_fk = getattr(self.model, f'{parent_model.__tablename__}_id')
+        on_clause = parent_fk == parent_model.id
+        if cursor is not None:
+            _, last_id = decode_cursor(cursor, 'id')
+            on_clause = and_(on_clause, self.model.id > last_id)
+        rows = await session.execute(
+            select(parent_model.id, self.model)
+            .outerjoin(self.model, on_clause)
+            .where(parent_model.id == parent_id, *live_where(parent_model))
+            .order_by(self.model.id)
+            .limit(limit + 1)
+        )
+        rows = rows.all()
+        if not rows:
+            raise_not_found(parent_model)
+        db_objs = [db_obj for _, db_obj in rows if db_obj is not None]
+        next_cursor = None
+        if len(db_objs) > limit:
+            db_objs = db_objs[:limit]
+            next_cursor = encode_cursor('id', db_objs[-1].id, db_objs[-1].id)
+        if not is_replica_session(session):
+            await self.cache.set(page_key, {
+                'items': [self._cache_values(db_obj) for db_obj in db_objs],
+                'next_cursor': next_cursor,
+            })
+        return {'items': db_objs, 'next_cursor': next_cursor}
+
+    async def _get_keyset_page(
+            self,
+            session: AsyncSession,
+            query,
+            column,
+            order_by: str,
+            limit: Optional[int],
+            cursor: Optional[str],
+            fields: Optional[tuple[str, ...]] = None,
+    ) -> dict:
+        """
+        Выбирает из запроса страницу, упорядоченную по column и id.
+        Запрос должен быть построен через _select с теми же `fields`.
+        """
+        descending = order_by.startswith('-')
+        limit = min(
+            limit or settings.PAGINATION_DEFAULT_LIMIT,
+            settings.PAGINATION_MAX_LIMIT,
+        )
+        if cursor is not None:
+            value, last_id = decode_cursor(
+                cursor, order_by, column_python_type(column)
+            )
+            if descending:
+                after = or_(
+                    column < value,
+                    and_(column == value, self.model.id < last_id),
+                )
+            else:
+                after = or_(
+                    column > value,
+                    and_(column == value, self.model.id > last_id),
+                )
+            query = query.where(after)
+        if descending:
+            query = query.order_by(column.desc(), self.model.id.desc())
+        else:
+            query = query.order_by(column, self.model.id)
+        rows = await session.execute(
+            query.add_columns(column).limit(limit + 1)
+        )
+        rows = rows.all()
+        if fields is None:
+            items = [row[0] for row in rows]
+        else:
+            items = [dict(zip(fields, row)) for row in rows]
+        next_cursor = None
+        if len(rows) > limit:
+            items = items[:limit]
+            last_item = items[-1]
+            last_id = last_item.id if fields is None else last_item['id']
+            next_cursor = encode_cursor(order_by, rows[limit - 1][-1], last_id)
+        return {'items': items, 'next_cursor': next_cursor}
+
     async def create(
             self,
             obj_in,
             user: User,
             session: AsyncSession,
     ):
-        """Создаёт объект в БД."""
+        """Создаёт объект в БД одним INSERT ... RETURNING."""
+        [db_obj] = await self._insert_returning(
+            session, [self._create_values(obj_in, user)]
+        )
+        await self._count_in_parents(session, [db_obj], 1)
+        await session.commit()
+        await self.invalidate(db_obj)
+        return db_obj
+
+    async def create_many(
+            self,
+            objs_in: list,
+            user: User,
+            session: AsyncSession,
+    ) -> list:
+        """
+        Создаёт объекты в БД одной транзакцией.
+        Если СУБД поддерживает RETURNING, все объекты вставляются
+        одним многострочным INSERT ... RETURNING.
+        """
+        if not objs_in:
+            return []
+        db_objs = await self._insert_returning(
+            session,
+            [self._create_values(obj_in, user) for obj_in in objs_in],
+        )
+        await self._count_in_parents(session, db_objs, 1)
+        await session.commit()
+        await self.invalidate(*db_objs)
+        return db_objs
+
+    async def _insert_returning(
+            self,
+            session: AsyncSession,
+            values: list[dict],
+    ) -> list:
+        """
+        Вставляет строки и возвращает созданные объекты.
+        Если СУБД поддерживает RETURNING, это один INSERT ... RETURNING
+        без повторного SELECT, иначе объекты добавляются через ORM.
+        """
+        if session.bind.dialect.full_returning:
+            db_objs = await session.execute(
+                select(self.model).from_statement(
+                    insert(self.model)
+                    .values(values)
+                    .returning(*self._loaded_columns())
+                )
+            )
+            return db_objs.scalars().all()
+        db_objs = [self.model(**obj_values) for obj_values in values]
+        session.add_all(db_objs)
+        await session.flush()
+        return db_objs
+
+    def _create_values(self, obj_in, user: User) -> dict:
+        """Значения колонок нового объекта."""
         obj_in_data = obj_in.dict()
         if user is not None:
             obj_in_data['user_id'] = user.id
-        db_obj = self.model(**obj_in_data)
-        session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
-        return db_obj
+        return obj_in_data
+
+    def _loaded_columns(self) -> list:
+        """Колонки модели, загружаемые вместе с объектом (без deferred)."""
+        return [
+            prop.columns[0]
+            for prop in self.model.__mapper__.column_attrs
+            if not prop.deferred
+        ]
 
     async def update(
             self,
@@ -67,24 +526,137 @@ class CRUDBase:
             obj_in,
             session: AsyncSession,
     ):
-        """Обновляет объект в БД."""
-        obj_data = jsonable_encoder(db_obj)
-        update_data = obj_in.dict(exclude_unset=True)
-
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        session.add(db_obj)
+        """Обновляет объект в БД одним UPDATE ... RETURNING."""
+        db_obj = await self._update_returning(
+            session,
+            (self.model.id == db_obj.id,),
+            self._update_values(obj_in),
+        )
         await session.commit()
-        await session.refresh(db_obj)
+        await self.invalidate(db_obj)
         return db_obj
 
+    async def update_by_owner(
+            self,
+            obj_id: int,
+            obj_in,
+            user: User,
+            session: AsyncSession,
+    ):
+        """
+        Обновляет объект, если пользователь - его автор или суперпользователь.
+        Проверка прав, изменение и чтение результата выполняются одним
+        UPDATE ... WHERE id = :id AND user_id = :user_id RETURNING.
+        Если строка не обновлена, бросает ошибку 404 или 403.
+        """
+        where = [self.model.id == obj_id, *self.live_where]
+        if not user.is_superuser:
+            where.append(self.model.user_id == user.id)
+        db_obj = await self._update_returning(
+            session, where, self._update_values(obj_in)
+        )
+        if db_obj is None:
+            # Запись в кэше могла устареть: причину узнаём по данным БД.
+            await self.cache.delete(f'version:{obj_id}')
+            db_obj = await self.get(obj_id, session)
+            await check_user_update_delete_rights(db_obj, user)
+        await session.commit()
+        await self.invalidate(db_obj)
+        return db_obj
+
+    async def _update_returning(
+            self,
+            session: AsyncSession,
+            where,
+            update_data: dict,
+    ):
+        """
+        Обновляет строку по условию и возвращает объект,
+        или None, если под условие не подошла ни одна строка.
+        """
+        if update_data and session.bind.dialect.full_returning:
+            db_obj = await session.execute(
+                select(self.model).from_statement(
+                    update(self.model)
+                    .where(*where)
+                    .values(update_data)
+                    .returning(*self._loaded_columns())
+                ).execution_options(populate_existing=True)
+            )
+            return db_obj.scalars().first()
+        db_obj = await session.execute(select(self.model).where(*where))
+        db_obj = db_obj.scalars().first()
+        if db_obj is not None:
+            for field, value in update_data.items():
+                setattr(db_obj, field, value)
+        return db_obj
+
+    def _update_values(self, obj_in) -> dict:
+        """Значения изменяемых колонок объекта."""
+        return obj_in.dict(exclude_unset=True)
+
     async def remove(
             self,
             db_obj,
             session: AsyncSession,
     ):
-        """Удаляет объект из БД."""
+        """
+        Удаляет объект из БД.
+        Дочерние строки удаляет сама БД (ON DELETE CASCADE), не загружая
+        их в сессию. Из кэша пропадают объект и страницы его детей
+        (вместе с версией объекта). Дети родителя с deleted_at по id
+        не кэшируются, остальные пропадают по истечении CACHE_TTL.
+        """
+        await self._count_in_parents(session, [db_obj], -1)
         await session.delete(db_obj)
+        deleted = list(session.deleted)
         await session.commit()
+        await self.invalidate(*deleted)
         return db_obj
+
+    async def remove_many(
+            self,
+            obj_ids: list[int],
+            session: AsyncSession,
+    ) -> list[int]:
+        """
+        Удаляет объекты по списку id одним DELETE ... RETURNING
+        и возвращает id удалённых объектов.
+        Объекты не загружаются в сессию, а их дочерние строки удаляет
+        сама БД (ON DELETE CASCADE), поэтому число запросов не зависит
+        от числа детей. Страницы детей удалённых объектов пропадают
+        из кэша вместе с версией, а сами дети, если они есть в кэше
+        объектов, - по истечении CACHE_TTL.
+        """
+        if not obj_ids:
+            return []
+        columns = [self.model.id] + [
+            foreign_key.parent
+            for foreign_key in self.model.__table__.foreign_keys
+        ]
+        if session.bind.dialect.name == 'postgresql':
+            # Один параметр-массив вместо IN с параметром на каждый id.
+            where = self.model.id == any_(
+                bindparam('obj_ids', obj_ids, type_=ARRAY(Integer))
+            )
+        else:
+            where = self.model.id.in_(obj_ids)
+        query = (
+            delete(self.model)
+            .where(where)
+            .execution_options(synchronize_session=False)
+        )
+        if session.bind.dialect.full_returning:
+            rows = await session.execute(query.returning(*columns))
+            rows = rows.all()
+        else:
+            rows = await session.execute(select(*columns).where(where))
+            rows = rows.all()
+            await session.execute(query)
+        await self._count_in_parents(session, rows, -1)
+        await session.commit()
+        keys = defaultdict(set)
+        for row in rows:
+            add_cache_keys(keys, self.model.__table__, row)
+        await delete_cache_keys(keys)
+        return [row.id for row in rows]
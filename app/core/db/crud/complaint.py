@@ -1,8 +1,9 @@
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.db.crud.base import CRUDBase
-from app.core.db.models import Complaint
+from app.core.db.models import Advert, Complaint
 
 
 class CRUDComplaint(CRUDBase):
@@ -10,14 +11,18 @@ class CRUDComplaint(CRUDBase):
         self,
         advert_id: int,
         session: AsyncSession,
-    ) -> list[Complaint]:
-        """Получить все жалобы на объявление."""
-        complaints = await session.execute(
-            select(self.model).where(
-                self.model.advert_id == advert_id
-            )
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Получить страницу жалоб на объявление.
+        Если объявление не найдено, бросает ошибку.
+        """
+        return await self.get_page_by_parent(
+            session, Advert, advert_id, limit=limit, cursor=cursor
         )
-        return complaints.scalars().all()
 
 
-complaint_crud = CRUDComplaint(Complaint)
+complaint_crud = CRUDComplaint(
+    Complaint, parent_counter=Advert.complaint_count
+)
@@ -1,8 +1,9 @@
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.db.crud.base import CRUDBase
-from app.core.db.models import Feedback
+from app.core.db.models import Advert, Feedback
 
 
 class CRUDFeedback(CRUDBase):
@@ -10,14 +11,16 @@ class CRUDFeedback(CRUDBase):
         self,
         advert_id: int,
         session: AsyncSession,
-    ) -> list[Feedback]:
-        """Получить все отзывы на объявление."""
-        feedbacks = await session.execute(
-            select(self.model).where(
-                self.model.advert_id == advert_id
-            )
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Получить страницу отзывов на объявление.
+        Если объявление не найдено, бросает ошибку.
+        """
+        return await self.get_page_by_parent(
+            session, Advert, advert_id, limit=limit, cursor=cursor
         )
-        return feedbacks.scalars().all()
 
 
-feedback_crud = CRUDFeedback(Feedback)
+feedback_crud = CRUDFeedback(Feedback, parent_counter=Advert.feedback_count)
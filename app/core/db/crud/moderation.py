@@ -0,0 +1,159 @@
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import and_, case, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db.crud.base import CRUDBase, raise_not_found
+from app.core.db.models import Complaint, ModerationItem, utc_now
+from app.core.settings import settings
+
+# INSERT ... ON CONFLICT DO UPDATE по диалектам.
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class CRUDModeration(CRUDBase):
+    async def moderate(
+            self,
+            session: AsyncSession,
+            complaint_ids: Optional[list[int]] = None,
+    ) -> int:
+        """
+        Учитывает в очереди модерации порцию новых жалоб и возвращает
+        их число. Если переданы `complaint_ids`, берутся только эти
+        жалобы, иначе - самые старые из неучтённых.
+        Жалобы блокируются через FOR UPDATE SKIP LOCKED, поэтому
+        несколько обработчиков не учтут одну жалобу дважды.
+        """
+        query = (
+            select(Complaint.id, Complaint.advert_id)
+            .where(Complaint.moderated.is_(False))
+            .order_by(Complaint.id)
+            .limit(settings.MODERATION_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        if complaint_ids is not None:
+            query = query.where(Complaint.id.in_(complaint_ids))
+        rows = (await session.execute(query)).all()
+        if not rows:
+            return 0
+        counts = Counter()
+        last_ids = {}
+        for complaint_id, advert_id in rows:
+            if advert_id is not None:
+                counts[advert_id] += 1
+                last_ids[advert_id] = complaint_id
+        if counts:
+            await self._add_to_queue(session, counts, last_ids)
+        await session.execute(
+            update(Complaint)
+            .where(Complaint.id.in_([row.id for row in rows]))
+            # Служебная отметка не меняет версию жалобы.
+            .values(moderated=True, updated_at=Complaint.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return len(rows)
+
+    async def _add_to_queue(
+            self,
+            session: AsyncSession,
+            counts: Counter,
+            last_ids: dict,
+    ) -> None:
+        """
+        Добавляет жалобы в строки очереди их объявлений одним
+        INSERT ... ON CONFLICT DO UPDATE и помечает объявления,
+        у которых число жалоб достигло порога.
+        """
+        now = utc_now()
+        threshold = settings.MODERATION_FLAG_THRESHOLD
+        upsert = UPSERT_INSERTS[session.bind.dialect.name]
+        insert = upsert(self.model).values([
+            {
+                'advert_id': advert_id,
+                'pending_count': count,
+                'last_complaint_id': last_ids[advert_id],
+                'flagged_at': now if count >= threshold else None,
+            }
+            for advert_id, count in sorted(counts.items())
+        ])
+        pending_count = (
+            self.model.pending_count + insert.excluded.pending_count
+        )
+        await session.execute(insert.on_conflict_do_update(
+            index_elements=[self.model.advert_id],
+            set_={
+                'pending_count': pending_count,
+                'last_complaint_id': case(
+                    (
+                        insert.excluded.last_complaint_id >
+                        self.model.last_complaint_id,
+                        insert.excluded.last_complaint_id,
+                    ),
+                    else_=self.model.last_complaint_id,
+                ),
+                'flagged_at': case(
+                    (
+                        and_(
+                            self.model.flagged_at.is_(None),
+                            pending_count >= threshold,
+                        ),
+                        now,
+                    ),
+                    else_=self.model.flagged_at,
+                ),
+                'updated_at': now,
+            },
+        ))
+
+    async def get_queue_page(
+            self,
+            session: AsyncSession,
+            flagged: Optional[bool] = None,
+            limit: Optional[int] = None,
+            cursor: Optional[str] = None,
+    ) -> dict:
+        """
+        Возвращает страницу очереди модерации по убыванию числа жалоб.
+        `flagged` оставляет только помеченные (True) или
+        непомеченные (False) объявления.
+        """
+        query = self._select()
+        if flagged is not None:
+            query = query.where(
+                self.model.flagged_at.isnot(None) if flagged
+                else self.model.flagged_at.is_(None)
+            )
+        return await self._get_keyset_page(
+            session,
+            query,
+            self.model.pending_count,
+            '-pending_count',
+            limit,
+            cursor,
+        )
+
+    async def get_by_advert(
+            self,
+            advert_id: int,
+            session: AsyncSession,
+    ) -> ModerationItem:
+        """
+        Возвращает строку очереди модерации объявления.
+        Если объявления нет в очереди, бросает ошибку.
+        """
+        db_obj = await session.execute(
+            select(self.model).where(self.model.advert_id == advert_id)
+        )
+        db_obj = db_obj.scalars().first()
+        if db_obj is None:
+            raise_not_found(self.model)
+        return db_obj
+
+
+moderation_crud = CRUDModeration(ModerationItem)
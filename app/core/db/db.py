@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import Column, Integer, exc
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, declared_attr, sessionmaker
 
+from app.core.db.pool import InstrumentedQueuePool
+from app.core.metrics import instrument_engine
+from app.core.read_your_writes import wrote_recently
 from app.core.settings import settings
 
 
@@ -16,12 +25,149 @@ class PreBase:
 
 Base = declarative_base(cls=PreBase)
 
-engine = create_async_engine(settings.database_url)
 
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession)
+def get_connect_args(timeout: Optional[float] = None) -> dict:
+    """
+    Параметры подключения asyncpg из настроек.
+    timeout - ожидание установки соединения, сек.
+    """
+    connect_args = {
+        'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if timeout is not None:
+        connect_args['timeout'] = timeout
+    if settings.DB_STATEMENT_TIMEOUT_MS is not None:
+        connect_args['server_settings'] = {
+            'statement_timeout': str(settings.DB_STATEMENT_TIMEOUT_MS),
+        }
+    return connect_args
+
+
+def create_engine(url: str, timeout: Optional[float] = None):
+    """
+    Создать движок с настройками пула из конфигурации
+    и учётом SQL-запросов в метриках.
+    timeout ограничивает и подключение к БД, и ожидание свободного
+    соединения пула (по умолчанию - DB_POOL_TIMEOUT и таймаут asyncpg).
+    """
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT if timeout is None else timeout,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=get_connect_args(timeout),
+    )
+    instrument_engine(engine)
+    return engine
+
+
+engine = create_engine(settings.database_url)
+
+# Объекты не сбрасываются после commit: ответ строится из уже
+# загруженных данных без повторного SELECT.
+AsyncSessionLocal = sessionmaker(
+    engine, class_=AsyncSession, expire_on_commit=False
+)
+
+replica_engine = (
+    create_engine(
+        settings.replica_database_url,
+        timeout=settings.REPLICA_CONNECT_TIMEOUT,
+    )
+    if settings.replica_database_url is not None else None
+)
+# Сессии реплики помечены в info: данные реплики могут отставать,
+# поэтому они не сохраняются в кэш (см. is_replica_session).
+ReplicaSessionLocal = (
+    sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        info={'replica': True},
+    )
+    if replica_engine is not None else None
+)
+
+# Ошибки подключения к реплике и время (time.monotonic), до которого
+# она не используется после последней ошибки.
+replica_state = {'failures': 0, 'retry_at': 0.0}
+
+logger = logging.getLogger(__name__)
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """Открыта ли сессия на реплике."""
+    return session.info.get('replica', False)
 
 
 async def get_async_session():
-    """Асинхронный генератор сессий."""
+    """
+    Асинхронный генератор сессий.
+    FastAPI создаёт сессию один раз на запрос, поэтому аутентификация
+    (get_user_db) и эндпоинт работают в одной сессии и держат не больше
+    одного соединения из пула. Обычно это и одна транзакция, но перед
+    проверкой пароля при входе и хешированием нового пароля UserManager
+    фиксирует её и возвращает соединение в пул, а продолжение запроса
+    берёт соединение заново.
+    """
     async with AsyncSessionLocal() as async_session:
         yield async_session
+
+
+async def connect_replica() -> Optional[AsyncSession]:
+    """
+    Открыть сессию реплики или вернуть None, если она недоступна.
+    После ошибки подключения или ожидания соединения в пуле реплика
+    REPLICA_RETRY_SECONDS не используется: запросы сразу читают
+    из основной БД, не дожидаясь таймаута реплики.
+    """
+    if time.monotonic() < replica_state['retry_at']:
+        return None
+    session = ReplicaSessionLocal()
+    try:
+        await session.connection()
+    except (exc.DBAPIError, exc.TimeoutError, OSError, asyncio.TimeoutError):
+        logger.warning('Реплика недоступна, чтение из основной БД')
+        replica_state['failures'] += 1
+        replica_state['retry_at'] = (
+            time.monotonic() + settings.REPLICA_RETRY_SECONDS
+        )
+        await session.close()
+        return None
+    return session
+
+
+def replica_pool_stats() -> Optional[dict]:
+    """Состояние пула реплики или None, если реплика не настроена."""
+    if replica_engine is None:
+        return None
+    return {
+        **replica_engine.sync_engine.pool.stats(),
+        'failures': replica_state['failures'],
+        'retry_in': max(replica_state['retry_at'] - time.monotonic(), 0),
+    }
+
+
+async def get_read_async_session(request: Request):
+    """Асинхронный генератор сессий для эндпоинтов чтения.
+
+    Отдает сессию реплики, если она настроена и доступна. Пользователь,
+    недавно изменявший данные, читает из основной БД, чтобы сразу
+    увидеть свои изменения (см. app/core/read_your_writes.py).
+    Эндпоинты с аутентификацией используют get_async_session,
+    чтобы не открывать вторую сессию рядом с сессией аутентификации.
+    """
+    session = None
+    if (
+        ReplicaSessionLocal is not None and
+        not await wrote_recently(request)
+    ):
+        session = await connect_replica()
+    if session is None:
+        session = AsyncSessionLocal()
+    async with session as async_session:
+        yield async_session
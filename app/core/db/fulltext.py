@@ -0,0 +1,98 @@
+"""
+Полнотекстовый поиск по объявлениям.
+
+В PostgreSQL поиск идёт по вычисляемой колонке Advert.search_vector
+(конфигурация russian) с GIN-индексом. В SQLite (тесты, локальный запуск)
+колонка создаётся пустой, а поиск идёт по виртуальной таблице FTS5,
+которую синхронизируют триггеры.
+"""
+import re
+
+from sqlalchemy import (
+    DDL, Float, event, func, literal_column, select, table,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+
+from app.core.db.models import Advert
+
+SEARCH_CONFIG = 'russian'
+
+_advert_fts = table('advert_fts', literal_column('rowid'))
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE advert_fts USING fts5("
+    "title, description, content='advert', content_rowid='id')",
+    "CREATE TRIGGER advert_fts_ai AFTER INSERT ON advert BEGIN "
+    "INSERT INTO advert_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER advert_fts_ad AFTER DELETE ON advert BEGIN "
+    "INSERT INTO advert_fts(advert_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER advert_fts_au AFTER UPDATE ON advert BEGIN "
+    "INSERT INTO advert_fts(advert_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO advert_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+)
+
+for statement in _SQLITE_DDL:
+    event.listen(
+        Advert.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
+event.listen(
+    Advert.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS advert_fts').execute_if(dialect='sqlite'),
+)
+
+
+@compiles(CreateColumn, 'sqlite')
+def _create_column_sqlite(element, compiler, **kw):
+    """В SQLite колонки только для PostgreSQL создаются как пустой TEXT."""
+    column = element.element
+    if column.info.get('postgresql_only'):
+        return f'{compiler.preparer.format_column(column)} TEXT'
+    return compiler.visit_create_column(element, **kw)
+
+
+def _sqlite_match_query(search_text: str) -> str:
+    """
+    Перевести запрос пользователя в синтаксис FTS5: каждое слово
+    экранируется и ищется по префиксу, слова объединяются через AND.
+    Запрос без слов превращается в пустую фразу, которая ничего не находит.
+    """
+    words = re.findall(r'\w+', search_text)
+    return ' '.join(f'"{word}"*' for word in words) or '""'
+
+
+def ranked_advert_ids(search_text: str, dialect_name: str):
+    """
+    Подзапрос с id найденных объявлений и их score.
+    Чем меньше score, тем релевантнее объявление.
+    """
+    if dialect_name == 'sqlite':
+        score = func.bm25(
+            literal_column('advert_fts'), 2.0, 1.0, type_=Float
+        )
+        return select(
+            _advert_fts.c.rowid.label('id'),
+            score.label('score'),
+        ).where(
+            literal_column('advert_fts').op('MATCH')(
+                _sqlite_match_query(search_text)
+            )
+        ).subquery()
+    ts_query = func.websearch_to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"), search_text
+    )
+    return select(
+        Advert.id,
+        (
+            -func.ts_rank(Advert.search_vector, ts_query, type_=Float)
+        ).label('score'),
+    ).where(
+        Advert.search_vector.op('@@')(ts_query)
+    ).subquery()
@@ -1,18 +1,53 @@
 import enum
+import hashlib
+from datetime import datetime, timezone
 
 from fastapi_users_db_sqlalchemy import SQLAlchemyBaseUserTable
-from sqlalchemy import Column, Enum, ForeignKey, String, Text, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Boolean, Column, Computed, DateTime, Enum, ForeignKey, Index, String,
+    Text, Integer, false, func, text as sql_text
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship, validates
 
 from app.core.db.db import Base
 
 
+def description_digest(description: str) -> str:
+    """
+    SHA-256 нормализованного описания объявления.
+    Нормализация: пробельные символы схлопываются в один пробел.
+    """
+    normalized = ' '.join(description.split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def utc_now() -> datetime:
+    """Текущее время в UTC."""
+    return datetime.now(timezone.utc)
+
+
+class UpdatedAtMixin:
+    """
+    Время последнего изменения записи.
+    Выставляется приложением при каждом INSERT и UPDATE и служит
+    версией строки, например для ETag.
+    """
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=utc_now,
+        onupdate=utc_now,
+        server_default=func.now(),
+    )
+
+
 class User(SQLAlchemyBaseUserTable[int], Base):
     """Модель пользователя."""
     pass
 
 
-class Advert(Base):
+class Advert(UpdatedAtMixin, Base):
     """Модель объявления."""
     class Kind(str, enum.Enum):
         """Вид объявления."""
@@ -22,7 +57,13 @@ class Advert(Base):
         SERVICE = "Услуга"
 
     title = Column(String(100), nullable=False)
-    description = Column(Text, unique=True, nullable=False)
+    description = Column(Text, nullable=False)
+    # Уникальность описания обеспечивается индексом по его хешу:
+    # индекс по полному тексту слишком велик и медленно обновляется.
+    description_hash = Column(
+        String(64),
+        nullable=False,
+    )
     kind = Column(
         Enum(
             Kind,
@@ -35,7 +76,97 @@ class Advert(Base):
         'user.id',
         name='fk_advert_user_id_user',
     ))
-    feedbacks = relationship('Feedback', cascade='delete')
+    # Отзывы и жалобы удаляет сама БД (ON DELETE CASCADE), без загрузки
+    # в сессию: ORM не выбирает их при удалении объявления.
+    feedbacks = relationship(
+        'Feedback', cascade='delete', passive_deletes=True
+    )
+    complaints = relationship(
+        'Complaint', cascade='delete', passive_deletes=True
+    )
+    # Число отзывов и жалоб на объявление. Поддерживаются CRUD отзывов
+    # и жалоб в той же транзакции, что и изменение дочерних записей.
+    feedback_count = Column(
+        Integer, nullable=False, default=0, server_default='0'
+    )
+    complaint_count = Column(
+        Integer, nullable=False, default=0, server_default='0'
+    )
+    # Время удаления. Удалённое объявление не видно в выдаче, а его
+    # строку и дочерние записи удаляет фоновый обработчик
+    # (см. app/core/purger.py).
+    deleted_at = Column(DateTime(timezone=True))
+    # Поисковый вектор PostgreSQL: вычисляется СУБД из названия (вес A)
+    # и описания (вес B). В SQLite вместо него используется FTS5,
+    # см. app/core/db/fulltext.py.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', title), 'A') || "
+            "setweight(to_tsvector('russian', description), 'B')",
+            persisted=True,
+        ),
+        info={'postgresql_only': True},
+    ))
+
+    __table_args__ = (
+        # Индексы под фильтрацию и сортировку в выдаче объявлений
+        # строятся только по неудалённым объявлениям.
+        Index(
+            'ix_advert_kind_price_id',
+            'kind',
+            'price',
+            'id',
+            postgresql_where=sql_text('deleted_at IS NULL'),
+        ),
+        Index(
+            'ix_advert_price_id',
+            'price',
+            'id',
+            postgresql_where=sql_text('deleted_at IS NULL'),
+        ),
+        Index('ix_advert_user_id_id', 'user_id', 'id'),
+        # Объявления с жалобами по убыванию их числа.
+        Index(
+            'ix_advert_complaint_count_id',
+            'complaint_count',
+            'id',
+            postgresql_where=sql_text(
+                'complaint_count > 0 AND deleted_at IS NULL'
+            ),
+        ),
+        Index(
+            'ix_advert_title_pattern',
+            'title',
+            postgresql_ops={'title': 'varchar_pattern_ops'},
+            postgresql_where=sql_text('deleted_at IS NULL'),
+        ),
+        # Описание уникально среди неудалённых объявлений.
+        Index(
+            'ix_advert_description_hash',
+            'description_hash',
+            unique=True,
+            postgresql_where=sql_text('deleted_at IS NULL'),
+            sqlite_where=sql_text('deleted_at IS NULL'),
+        ),
+        # Удалённые объявления, ожидающие очистки.
+        Index(
+            'ix_advert_deleted_id',
+            'id',
+            postgresql_where=sql_text('deleted_at IS NOT NULL'),
+            sqlite_where=sql_text('deleted_at IS NOT NULL'),
+        ),
+        Index(
+            'ix_advert_search_vector',
+            'search_vector',
+            postgresql_using='gin',
+        ),
+    )
+
+    @validates('description')
+    def _set_description_hash(self, key, description):
+        self.description_hash = description_digest(description)
+        return description
 
     def __repr__(self):
         return (
@@ -43,17 +174,23 @@ class Advert(Base):
         )
 
 
-class Feedback(Base):
+class Feedback(UpdatedAtMixin, Base):
     """Модель отзыва."""
     text = Column(Text, nullable=False)
     advert_id = Column(Integer, ForeignKey(
         'advert.id',
         name='fk_advert_feedback_id_feedback',
+        ondelete='CASCADE',
     ))
     user_id = Column(Integer, ForeignKey(
         'user.id',
         name='fk_advert_user_id_user',
-    ))
+    ), index=True)
+
+    __table_args__ = (
+        # Выборка по объявлению с пагинацией по id.
+        Index('ix_feedback_advert_id_id', 'advert_id', 'id'),
+    )
 
     def __repr__(self):
         return (
@@ -61,19 +198,68 @@ class Feedback(Base):
         )
 
 
-class Complaint(Base):
+class Complaint(UpdatedAtMixin, Base):
     """Модель жалобы."""
     text = Column(Text, nullable=False)
     advert_id = Column(Integer, ForeignKey(
         'advert.id',
         name='fk_advert_feedback_id_feedback',
+        ondelete='CASCADE',
     ))
     user_id = Column(Integer, ForeignKey(
         'user.id',
         name='fk_advert_user_id_user',
-    ))
+    ), index=True)
+    # Жалоба учтена в очереди модерации (см. app/core/moderation.py).
+    moderated = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+
+    __table_args__ = (
+        # Выборка по объявлению с пагинацией по id.
+        Index('ix_complaint_advert_id_id', 'advert_id', 'id'),
+        # Жалобы, ещё не учтённые в очереди модерации.
+        Index(
+            'ix_complaint_pending_id',
+            'id',
+            postgresql_where=sql_text('NOT moderated'),
+        ),
+    )
 
     def __repr__(self):
         return (
             f'Жалоба: {self.text[:50]}'
         )
+
+
+class ModerationItem(UpdatedAtMixin, Base):
+    """
+    Объявление в очереди модерации.
+    Строки заполняются фоновым обработчиком жалоб порциями, поэтому
+    модератор получает очередь без подсчёта жалоб по их таблице.
+    """
+    advert_id = Column(
+        Integer,
+        ForeignKey(
+            'advert.id',
+            name='fk_moderationitem_advert_id_advert',
+            ondelete='CASCADE',
+        ),
+        unique=True,
+        nullable=False,
+    )
+    # Жалобы, поступившие с момента последней проверки модератором.
+    pending_count = Column(Integer, nullable=False)
+    last_complaint_id = Column(Integer, nullable=False)
+    # Когда число жалоб достигло MODERATION_FLAG_THRESHOLD.
+    flagged_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Очередь по убыванию числа жалоб.
+        Index('ix_moderationitem_pending_count_id', 'pending_count', 'id'),
+    )
+
+    def __repr__(self):
+        return (
+            f'Модерация объявления №{self.advert_id}'
+        )
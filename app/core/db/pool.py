@@ -0,0 +1,99 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Соединения, взятые из пула в рамках текущего HTTP-запроса:
+# всего выдач, удерживаемые сейчас и наибольшее число одновременно.
+request_checkouts: ContextVar[Optional[dict]] = ContextVar(
+    'request_checkouts', default=None
+)
+
+# Статистика выдачи соединений по HTTP-запросам.
+request_checkout_stats = {
+    'requests': 0,
+    'requests_multi_connection': 0,
+    'max_checkouts_per_request': 0,
+    'max_connections_per_request': 0,
+}
+
+
+def new_request_counter() -> dict:
+    """Счётчик соединений для нового запроса."""
+    return {'checkouts': 0, 'held': 0, 'peak': 0}
+
+
+def record_request_checkouts(method: str, path: str, counter: dict):
+    """
+    Учитывает соединения, взятые из пула за время запроса.
+    Запрос не должен держать больше одного соединения одновременно:
+    аутентификация и эндпоинт работают в одной сессии.
+    """
+    stats = request_checkout_stats
+    stats['requests'] += 1
+    stats['max_checkouts_per_request'] = max(
+        stats['max_checkouts_per_request'], counter['checkouts']
+    )
+    stats['max_connections_per_request'] = max(
+        stats['max_connections_per_request'], counter['peak']
+    )
+    if counter['peak'] > 1:
+        stats['requests_multi_connection'] += 1
+        logger.warning(
+            'Запрос %s %s держал одновременно %s соединения с БД',
+            method, path, counter['peak'],
+        )
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, собирающий статистику выдачи соединений."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+        counter = request_checkouts.get()
+        if counter is not None:
+            counter['checkouts'] += 1
+            counter['held'] += 1
+            counter['peak'] = max(counter['peak'], counter['held'])
+        return connection
+
+    def _do_return_conn(self, conn):
+        counter = request_checkouts.get()
+        if counter is not None and counter['held'] > 0:
+            counter['held'] -= 1
+        super()._do_return_conn(conn)
+
+    def stats(self) -> dict:
+        """Текущее состояние пула и накопленная статистика ожидания."""
+        return {
+            'size': self.size(),
+            'checked_in': self.checkedin(),
+            'checked_out': self.checkedout(),
+            'overflow': max(self.overflow(), 0),
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_time_total': self.wait_time_total,
+            'wait_time_max': self.wait_time_max,
+        }
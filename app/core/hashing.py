@@ -0,0 +1,192 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import (
+    Executor, ProcessPoolExecutor, ThreadPoolExecutor,
+)
+from http import HTTPStatus
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+from fastapi_users.password import PasswordHelper, PasswordHelperProtocol
+
+from app.core.settings import settings
+
+# Помощник bcrypt по умолчанию из fastapi-users. Функции ниже вызываются
+# в пуле, в том числе в дочерних процессах, поэтому он на уровне модуля.
+password_helper = PasswordHelper()
+
+
+def _hash(password: str) -> str:
+    return password_helper.hash(password)
+
+
+def _verify_and_update(
+        plain_password: str,
+        hashed_password: str,
+) -> tuple[bool, Optional[str]]:
+    return password_helper.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHashingPool:
+    """
+    Выполняет хеширование и проверку паролей вне цикла событий.
+    bcrypt намеренно медленный, и вызов в цикле событий останавливает
+    все остальные запросы процесса. Одновременно выполняется не больше
+    `workers` операций, остальные ждут в очереди. Если очередь длиннее
+    `max_queue`, запрос отклоняется с ошибкой 503.
+    """
+
+    def __init__(self, workers: int, executor: str, max_queue: int):
+        self.workers = workers
+        self.executor_kind = executor
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._semaphore = asyncio.Semaphore(workers)
+        self.in_progress = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.run_time_total = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == 'process':
+                # spawn: fork процесса с потоками и открытыми соединениями
+                # может зависнуть на унаследованных блокировках.
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix='password-hashing'
+                )
+        return self._executor
+
+    async def _run(self, func: Callable, *args):
+        if self.max_queue and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Сервис перегружен, повторите попытку позже!',
+            )
+        self.queued += 1
+        queued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        started = time.perf_counter()
+        waited = started - queued_at
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        self.in_progress += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+        finally:
+            self.in_progress -= 1
+            self.completed += 1
+            self.run_time_total += time.perf_counter() - started
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """Хеш пароля."""
+        return await self._run(_hash, password)
+
+    async def verify_and_update(
+            self,
+            plain_password: str,
+            hashed_password: str,
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Проверка пароля. Вторым значением возвращает новый хеш,
+        если старый нужно обновить, иначе None.
+        """
+        return await self._run(
+            _verify_and_update, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        """Останавливает пул."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        """Загрузка пула и статистика очереди."""
+        return {
+            'executor': self.executor_kind,
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_progress': self.in_progress,
+            'queued': self.queued,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_time_total': self.wait_time_total,
+            'wait_time_max': self.wait_time_max,
+            'run_time_total': self.run_time_total,
+        }
+
+
+class PooledPasswordHelper(PasswordHelperProtocol):
+    """
+    Помощник паролей для UserManager, считающий bcrypt в пуле.
+    fastapi-users вызывает hash и verify_and_update синхронно, поэтому
+    менеджер заранее считает результат в пуле (prepare_hash,
+    prepare_verify), а эти методы отдают готовое значение. Без
+    подготовки результат считается в цикле событий, как в fastapi-users.
+    Хранит пароли запроса, поэтому создаётся на каждый запрос.
+    """
+
+    def __init__(self, pool: PasswordHashingPool):
+        self.pool = pool
+        self._hashes: dict[str, str] = {}
+        self._verified: dict[tuple[str, str], tuple[bool, Optional[str]]] = {}
+
+    async def prepare_hash(self, password: str) -> None:
+        """Посчитать в пуле хеш для следующего вызова hash."""
+        self._hashes[password] = await self.pool.hash(password)
+
+    async def prepare_verify(
+            self,
+            plain_password: str,
+            hashed_password: str,
+    ) -> None:
+        """Проверить пароль в пуле для следующего verify_and_update."""
+        self._verified[plain_password, hashed_password] = (
+            await self.pool.verify_and_update(plain_password, hashed_password)
+        )
+
+    def hash(self, password: str) -> str:
+        hashed_password = self._hashes.pop(password, None)
+        if hashed_password is None:
+            return password_helper.hash(password)
+        return hashed_password
+
+    def verify_and_update(
+            self,
+            plain_password: str,
+            hashed_password: str,
+    ) -> tuple[bool, Optional[str]]:
+        result = self._verified.pop((plain_password, hashed_password), None)
+        if result is None:
+            return password_helper.verify_and_update(
+                plain_password, hashed_password
+            )
+        return result
+
+    def generate(self) -> str:
+        return password_helper.generate()
+
+
+password_pool = PasswordHashingPool(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_EXECUTOR,
+    settings.PASSWORD_HASH_MAX_QUEUE,
+)
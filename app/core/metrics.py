@@ -0,0 +1,238 @@
+"""
+Метрики HTTP-запросов и запросов к БД в формате Prometheus.
+
+MetricsMiddleware (app/core/middleware.py) измеряет время каждого
+HTTP-запроса, а обработчики событий движка (instrument_engine) -
+число и время SQL-запросов, выполненных за время HTTP-запроса.
+Метрики копятся в памяти процесса и отдаются эндпоинтом /metrics.
+"""
+import time
+from collections import Counter as ShapeCounter
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+
+from app.core.query_debug import repeated_shapes, statement_shape
+from app.core.settings import settings
+
+# SQL-запросы в рамках текущего HTTP-запроса: число, суммарное время
+# и, с QUERY_DEBUG, число запросов каждой формы.
+request_queries: ContextVar[Optional[dict]] = ContextVar(
+    'request_queries', default=None
+)
+
+# Границы корзин гистограмм: время, сек, и число SQL-запросов.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Метка маршрута для запросов, не попавших ни в один эндпоинт.
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    """Метки в формате Prometheus: {name="value",...}."""
+    labels = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value)
+            .replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'),
+        )
+        for name, value in zip(names, values)
+    )
+    return '{' + labels + '}' if labels else ''
+
+
+class Counter:
+    """Счётчик Prometheus с метками."""
+
+    def __init__(
+            self,
+            name: str,
+            description: str,
+            label_names: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), value: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self._values.items()):
+            yield (
+                f'{self.name}{format_labels(self.label_names, labels)} '
+                f'{value}'
+            )
+
+
+class Histogram:
+    """Гистограмма Prometheus с метками."""
+
+    def __init__(
+            self,
+            name: str,
+            description: str,
+            label_names: tuple[str, ...],
+            buckets: tuple,
+    ):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        # Метки -> [число значений по корзинам, сумма, число].
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0, 0]
+        bucket_counts = series[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                bucket_counts[index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f'# HELP {self.name} {self.description}'
+        yield f'# TYPE {self.name} histogram'
+        bucket_names = self.label_names + ('le',)
+        for labels, (bucket_counts, total, count) in sorted(
+            self._series.items()
+        ):
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                bucket_labels = format_labels(bucket_names, labels + (bound,))
+                yield f'{self.name}_bucket{bucket_labels} {bucket_count}'
+            bucket_labels = format_labels(bucket_names, labels + ('+Inf',))
+            yield f'{self.name}_bucket{bucket_labels} {count}'
+            labels = format_labels(self.label_names, labels)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+http_requests = Counter(
+    'http_requests_total',
+    'HTTP-запросы по маршрутам и кодам ответа.',
+    ('method', 'route', 'status'),
+)
+http_request_duration = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки HTTP-запроса, сек.',
+    ('method', 'route'),
+    LATENCY_BUCKETS,
+)
+http_request_db_duration = Histogram(
+    'http_request_db_duration_seconds',
+    'Время SQL-запросов за HTTP-запрос, сек.',
+    ('method', 'route'),
+    LATENCY_BUCKETS,
+)
+http_request_db_statements = Histogram(
+    'http_request_db_statements',
+    'Число SQL-запросов за HTTP-запрос.',
+    ('method', 'route'),
+    STATEMENT_BUCKETS,
+)
+http_request_repeated_queries = Counter(
+    'http_request_repeated_queries_total',
+    'HTTP-запросы с повторяющимися SQL-запросами (QUERY_DEBUG).',
+    ('method', 'route'),
+)
+db_statements = Counter(
+    'db_statements_total',
+    'SQL-запросы, включая фоновые обработчики.',
+)
+db_statement_duration = Counter(
+    'db_statement_duration_seconds_total',
+    'Суммарное время SQL-запросов, сек.',
+)
+
+METRICS = (
+    http_requests,
+    http_request_duration,
+    http_request_db_duration,
+    http_request_db_statements,
+    http_request_repeated_queries,
+    db_statements,
+    db_statement_duration,
+)
+
+
+def new_request_queries() -> dict:
+    """Счётчик SQL-запросов для нового HTTP-запроса."""
+    return {
+        'statements': 0,
+        'db_time': 0.0,
+        'shapes': ShapeCounter() if settings.QUERY_DEBUG else None,
+    }
+
+
+def record_request(
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        queries: dict,
+) -> None:
+    """Учитывает завершённый HTTP-запрос в метриках."""
+    labels = (method, route)
+    http_requests.inc((method, route, status))
+    http_request_duration.observe(labels, duration)
+    http_request_db_duration.observe(labels, queries['db_time'])
+    http_request_db_statements.observe(labels, queries['statements'])
+    if queries['shapes'] and repeated_shapes(queries['shapes']):
+        http_request_repeated_queries.inc(labels)
+
+
+def server_timing(queries: dict, duration: float) -> str:
+    """Значение заголовка Server-Timing: время приложения и БД, мс."""
+    return (
+        f'app;dur={duration * 1000:.1f}, '
+        f'db;dur={queries["db_time"] * 1000:.1f};'
+        f'desc="{queries["statements"]} queries"'
+    )
+
+
+def render_metrics() -> str:
+    """Все метрики процесса в текстовом формате Prometheus."""
+    lines = [line for metric in METRICS for line in metric.render()]
+    return '\n'.join(lines) + '\n'
+
+
+def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany,
+):
+    context.metrics_started = time.perf_counter()
+
+
+def after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany,
+):
+    elapsed = time.perf_counter() - context.metrics_started
+    db_statements.inc()
+    db_statement_duration.inc(value=elapsed)
+    queries = request_queries.get()
+    if queries is not None:
+        queries['statements'] += 1
+        queries['db_time'] += elapsed
+        if queries['shapes'] is not None:
+            queries['shapes'][statement_shape(statement)] += 1
+
+
+def instrument_engine(engine) -> None:
+    """Подключает учёт SQL-запросов к асинхронному движку."""
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+    event.listen(
+        engine.sync_engine, 'after_cursor_execute', after_cursor_execute
+    )
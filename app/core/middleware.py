@@ -0,0 +1,123 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.db.pool import (
+    new_request_counter,
+    record_request_checkouts,
+    request_checkouts,
+)
+from app.core.metrics import (
+    UNMATCHED_ROUTE,
+    new_request_queries,
+    record_request,
+    request_queries,
+    server_timing,
+)
+from app.core.query_debug import check_repeated_queries
+
+
+class DBCheckoutsMiddleware:
+    """ASGI-middleware, считающее соединения с БД, взятые запросом."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        counter = new_request_counter()
+        token = request_checkouts.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_checkouts.reset(token)
+            record_request_checkouts(
+                scope['method'], scope['path'], counter
+            )
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, собирающее метрики запроса: время обработки,
+    число и время SQL-запросов по маршрутам. С `server_timing=True`
+    добавляет их в заголовок ответа Server-Timing. Заголовок
+    отправляется до тела ответа, поэтому у потоковых ответов в нём
+    только время до начала выгрузки.
+    С QUERY_DEBUG SQL-запросы проверяются на повторы перед отправкой
+    последней части тела, а начало ответа придерживается до первой
+    части: если в ответе одна часть, RepeatedQueriesError приводит
+    к ответу 500, потоковый ответ при ошибке обрывается.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+        # Эндпоинт -> шаблон пути маршрута, например /adverts/{advert_id}.
+        self._route_paths = None
+
+    def route_path(self, scope) -> str:
+        """
+        Шаблон пути маршрута запроса. Метрики группируются по шаблону,
+        а не по пути, чтобы число рядов не росло с числом объектов.
+        """
+        if self._route_paths is None:
+            self._route_paths = {
+                route.endpoint: route.path
+                for route in scope['app'].routes
+                if hasattr(route, 'endpoint')
+            }
+        return self._route_paths.get(scope.get('endpoint'), UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        queries = new_request_queries()
+        token = request_queries.set(queries)
+        started = time.perf_counter()
+        status = 500
+        pending_start = None
+
+        async def send_with_metrics(message):
+            nonlocal status, pending_start
+            if message['type'] == 'http.response.start':
+                if self.server_timing:
+                    MutableHeaders(scope=message).append(
+                        'Server-Timing',
+                        server_timing(
+                            queries, time.perf_counter() - started
+                        ),
+                    )
+                if queries['shapes'] is not None:
+                    pending_start = message
+                    return
+                status = message['status']
+            elif (
+                message['type'] == 'http.response.body' and
+                queries['shapes'] is not None
+            ):
+                if not message.get('more_body', False):
+                    check_repeated_queries(
+                        scope['method'],
+                        self.route_path(scope),
+                        queries['shapes'],
+                    )
+                if pending_start is not None:
+                    status = pending_start['status']
+                    await send(pending_start)
+                    pending_start = None
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            request_queries.reset(token)
+            record_request(
+                scope['method'],
+                self.route_path(scope),
+                status,
+                time.perf_counter() - started,
+                queries,
+            )
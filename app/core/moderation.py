@@ -0,0 +1,169 @@
+"""
+Фоновая обработка жалоб для очереди модерации.
+
+Создание жалобы остаётся одним INSERT: эндпоинт только передаёт номер
+жалобы обработчику. Обработчик учитывает жалобы порциями в таблице
+очереди модерации (ModerationItem) и помечает объявления, набравшие
+MODERATION_FLAG_THRESHOLD жалоб.
+
+Источник истины - отметка Complaint.moderated, поэтому жалобы
+не теряются: при запуске обработчик учитывает всё, что осталось
+необработанным, а в режиме postgres ещё и регулярно опрашивает таблицу.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.db.crud.moderation import moderation_crud
+from app.core.db.db import AsyncSessionLocal
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModerationQueue:
+    """
+    Очередь жалоб для фонового обработчика.
+    memory: номера новых жалоб копятся MODERATION_BATCH_DELAY секунд
+    и обрабатываются порцией. Номера, не обработанные до остановки
+    процесса, будут учтены при следующем запуске. В очереди не больше
+    MODERATION_QUEUE_MAX_SIZE номеров: не поместившиеся номера и номера
+    порции, обработка которой завершилась ошибкой, не хранятся -
+    через MODERATION_POLL_INTERVAL секунд обработчик учитывает
+    все необработанные жалобы из таблицы.
+    postgres: номера служат только сигналом, обработчик выбирает
+    неучтённые жалобы из таблицы через FOR UPDATE SKIP LOCKED
+    и без сигналов раз в MODERATION_POLL_INTERVAL секунд, поэтому
+    подхватывает жалобы, созданные в других процессах.
+    """
+
+    def __init__(
+            self,
+            backend: str,
+            batch_size: int,
+            batch_delay: float,
+            poll_interval: float,
+            max_size: int,
+    ):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.poll_interval = poll_interval
+        self._queue: asyncio.Queue = asyncio.Queue(max_size)
+        self._task: Optional[asyncio.Task] = None
+        # Есть жалобы, которые можно найти только в таблице.
+        self._rescan = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.processed = 0
+        self.batches = 0
+        self.errors = 0
+
+    def put(self, *complaint_ids: int) -> None:
+        """Передать обработчику номера новых жалоб."""
+        for complaint_id in complaint_ids:
+            try:
+                self._queue.put_nowait(complaint_id)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self._rescan = True
+            else:
+                self.enqueued += 1
+
+    def start(self) -> None:
+        """Запустить обработчик в текущем цикле событий."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить обработчик."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        await self._process_pending()
+        while True:
+            if self.backend == 'postgres':
+                try:
+                    await asyncio.wait_for(
+                        self._queue.get(), self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                await asyncio.sleep(self.batch_delay)
+                self._take(self._queue.qsize())
+                await self._process_pending()
+            elif self._rescan:
+                self._rescan = False
+                await asyncio.sleep(self.poll_interval)
+                # Жалобы из очереди уже в таблице и учтутся вместе с ней.
+                self._take(self._queue.qsize())
+                await self._process_pending()
+            else:
+                complaint_ids = [await self._queue.get()]
+                await asyncio.sleep(self.batch_delay)
+                complaint_ids += self._take(self.batch_size - 1)
+                await self._process(complaint_ids)
+
+    def _take(self, count: int) -> list[int]:
+        """Забрать из очереди до count номеров без ожидания."""
+        return [
+            self._queue.get_nowait()
+            for _ in range(min(count, self._queue.qsize()))
+        ]
+
+    async def _process_pending(self) -> None:
+        """Учесть все необработанные жалобы из таблицы."""
+        while await self._process() >= self.batch_size:
+            pass
+
+    async def _process(
+            self,
+            complaint_ids: Optional[list[int]] = None,
+    ) -> int:
+        try:
+            async with AsyncSessionLocal() as session:
+                processed = await moderation_crud.moderate(
+                    session, complaint_ids
+                )
+        except Exception:
+            self.errors += 1
+            self._rescan = True
+            logger.exception(
+                'Ошибка обработки жалоб для модерации %s, они будут '
+                'учтены при следующем просмотре таблицы',
+                complaint_ids if complaint_ids is not None else '',
+            )
+            return 0
+        if processed:
+            self.processed += processed
+            self.batches += 1
+        return processed
+
+    def stats(self) -> dict:
+        """Состояние очереди в текущем процессе."""
+        return {
+            'backend': self.backend,
+            'running': self._task is not None,
+            'queued': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'processed': self.processed,
+            'batches': self.batches,
+            'errors': self.errors,
+        }
+
+
+moderation_queue = ModerationQueue(
+    settings.MODERATION_QUEUE,
+    settings.MODERATION_BATCH_SIZE,
+    settings.MODERATION_BATCH_DELAY,
+    settings.MODERATION_POLL_INTERVAL,
+    settings.MODERATION_QUEUE_MAX_SIZE,
+)
@@ -0,0 +1,97 @@
+"""
+Фоновая очистка удалённых объявлений.
+
+Запрос на удаление только помечает объявление (Advert.deleted_at).
+Обработчик удаляет его отзывы, жалобы и само объявление порциями
+по PURGE_BATCH_SIZE строк, каждая в своей транзакции, поэтому
+блокировки держатся недолго при любом числе дочерних записей.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.db.crud.advert import advert_crud
+from app.core.db.db import AsyncSessionLocal
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AdvertPurger:
+    """
+    Обработчик, очищающий удалённые объявления.
+    Запускается сигналом wake() после удаления объявления, а также
+    раз в PURGE_POLL_INTERVAL секунд, чтобы очистить объявления,
+    удалённые в других процессах или до перезапуска.
+    """
+
+    def __init__(self, batch_size: int, poll_interval: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.deleted_rows = 0
+        self.batches = 0
+        self.errors = 0
+
+    def wake(self) -> None:
+        """Начать очистку, не дожидаясь очередной проверки."""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Запустить обработчик в текущем цикле событий."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Остановить обработчик."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            while await self._purge_batch():
+                pass
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), self.poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _purge_batch(self) -> int:
+        try:
+            async with AsyncSessionLocal() as session:
+                deleted = await advert_crud.purge_deleted(
+                    session, self.batch_size
+                )
+        except Exception:
+            self.errors += 1
+            logger.exception('Ошибка очистки удалённых объявлений')
+            return 0
+        if deleted:
+            self.deleted_rows += deleted
+            self.batches += 1
+        return deleted
+
+    def stats(self) -> dict:
+        """Состояние обработчика в текущем процессе."""
+        return {
+            'running': self._task is not None,
+            'deleted_rows': self.deleted_rows,
+            'batches': self.batches,
+            'errors': self.errors,
+        }
+
+
+advert_purger = AdvertPurger(
+    settings.PURGE_BATCH_SIZE,
+    settings.PURGE_POLL_INTERVAL,
+)
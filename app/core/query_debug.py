@@ -0,0 +1,72 @@
+"""
+Поиск N+1 запросов при разработке и в тестах (QUERY_DEBUG).
+
+За время HTTP-запроса SQL-запросы группируются по форме: тексту
+запроса без значений параметров. Если запрос одной формы повторён
+QUERY_DEBUG_REPEAT_THRESHOLD раз и больше, скорее всего он выполняется
+в цикле, например при ленивой загрузке связи для каждого объекта.
+Такой маршрут пишется в журнал, а с QUERY_DEBUG_RAISE запрос
+завершается ошибкой RepeatedQueriesError. Проверка выполняется
+до отправки последней части тела ответа (см. MetricsMiddleware):
+клиент получает 500 или оборванный потоковый ответ, а TestClient
+пробрасывает ошибку в тест.
+"""
+import logging
+import re
+from collections import Counter
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Параметры asyncpg ($1), sqlite (?) и psycopg2 (%s, %(name)s).
+PLACEHOLDER = re.compile(r'\$\d+|\?|%s|%\(\w+\)s')
+# Списки параметров: IN (?, ?, ?) и VALUES (?, ?), (?, ?).
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+PLACEHOLDER_LISTS = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+WHITESPACE = re.compile(r'\s+')
+
+
+class RepeatedQueriesError(Exception):
+    """HTTP-запрос повторил SQL-запрос одной формы слишком много раз."""
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Форма SQL-запроса: текст без значений и длины списков параметров,
+    чтобы IN и VALUES с разным числом элементов совпадали.
+    """
+    shape = PLACEHOLDER.sub('?', statement)
+    shape = PLACEHOLDER_LIST.sub('(?)', shape)
+    shape = PLACEHOLDER_LISTS.sub('(?)', shape)
+    return WHITESPACE.sub(' ', shape).strip()
+
+
+def repeated_shapes(shapes: Counter) -> list[tuple[str, int]]:
+    """Формы SQL-запросов, повторённые не меньше порога, и их число."""
+    return [
+        (shape, count) for shape, count in shapes.most_common()
+        if count >= settings.QUERY_DEBUG_REPEAT_THRESHOLD
+    ]
+
+
+def check_repeated_queries(method: str, route: str, shapes: Counter):
+    """
+    Проверяет SQL-запросы HTTP-запроса на повторы одной формы.
+    Повторы пишутся в журнал, а с QUERY_DEBUG_RAISE бросается
+    RepeatedQueriesError.
+    """
+    repeated = repeated_shapes(shapes)
+    if not repeated:
+        return
+    for shape, count in repeated:
+        logger.warning(
+            'Запрос %s %s выполнил %s раз SQL-запрос: %s',
+            method, route, count, shape,
+        )
+    if settings.QUERY_DEBUG_RAISE:
+        shape, count = repeated[0]
+        raise RepeatedQueriesError(
+            f'{method} {route}: {count} одинаковых SQL-запросов '
+            f'(порог {settings.QUERY_DEBUG_REPEAT_THRESHOLD}): {shape}'
+        )
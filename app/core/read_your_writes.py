@@ -0,0 +1,64 @@
+"""
+Чтение своих записей при работе с репликой.
+
+После успешного изменяющего запроса пользователя его id сохраняется
+в кэше на READ_YOUR_WRITES_SECONDS. Пока метка есть, эндпоинты чтения
+отдают ему данные основной БД: реплика может ещё не получить его
+изменения. Пользователь определяется по JWT из заголовка
+Authorization, без запроса к БД, поэтому метка учитывается, если
+клиент передаёт токен и в запросах чтения.
+С CACHE_BACKEND=memory метка есть только в процессе, выполнившем
+запись; с redis она общая для всех процессов.
+"""
+from typing import Optional
+
+import jwt
+from fastapi import Request, Response
+from fastapi_users.jwt import decode_jwt
+
+from app.core.cache import create_cache
+from app.core.settings import settings
+
+# Аудитория JWT приложения (см. app/core/user.py).
+TOKEN_AUDIENCE = ['fastapi-users:auth']
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Метки малы, поэтому их хранится больше, чем объектов в кэше моделей:
+# вытесненная метка отправила бы пользователя на реплику.
+recent_writers = create_cache(
+    'recent_writers',
+    max_size=100 * settings.CACHE_SIZE,
+    ttl=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+def token_user_id(request: Request) -> Optional[str]:
+    """Id пользователя из JWT запроса или None, если токена нет."""
+    scheme, _, token = request.headers.get('authorization', '').partition(
+        ' '
+    )
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    try:
+        payload = decode_jwt(token, settings.SECRET, TOKEN_AUDIENCE)
+    except jwt.PyJWTError:
+        return None
+    return payload.get('user_id')
+
+
+async def remember_write(request: Request, response: Response) -> None:
+    """Отметить пользователя, успешно изменившего данные."""
+    if request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    user_id = token_user_id(request)
+    if user_id is not None:
+        await recent_writers.set(user_id, True)
+
+
+async def wrote_recently(request: Request) -> bool:
+    """Изменял ли пользователь запроса данные за READ_YOUR_WRITES_SECONDS."""
+    user_id = token_user_id(request)
+    return user_id is not None and (
+        await recent_writers.get(user_id) is not None
+    )
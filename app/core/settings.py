@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseSettings, EmailStr
 
@@ -18,6 +18,90 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str  # пароль для подключения к БД
     DB_HOST: str  # название сервиса (контейнера)
     DB_PORT: str  # порт для подключения к БД
+    # Реплика для чтения (None - все запросы идут в основную БД)
+    REPLICA_DB_HOST: Optional[str] = None
+    REPLICA_DB_PORT: Optional[str] = None
+    # Ожидание подключения к реплике и свободного соединения её пула, сек
+    REPLICA_CONNECT_TIMEOUT: float = 1
+    # Сколько секунд после ошибки подключения реплика не используется
+    REPLICA_RETRY_SECONDS: float = 10
+    # Сколько секунд после записи пользователь читает из основной БД
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Настройки пула соединений с БД
+    DB_POOL_SIZE: int = 5  # постоянные соединения в пуле
+    DB_MAX_OVERFLOW: int = 10  # дополнительные соединения сверх пула
+    DB_POOL_TIMEOUT: float = 30  # ожидание свободного соединения, сек
+    DB_POOL_RECYCLE: int = -1  # пересоздание соединения, сек (-1 - никогда)
+    DB_POOL_PRE_PING: bool = False  # проверка соединения перед выдачей
+    DB_STATEMENT_CACHE_SIZE: int = 100  # кэш подготовленных запросов asyncpg
+    # statement_timeout на стороне PostgreSQL, мс (None - без ограничения)
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+
+    # Настройки пагинации
+    PAGINATION_DEFAULT_LIMIT: int = 50  # размер страницы по умолчанию
+    PAGINATION_MAX_LIMIT: int = 500  # максимально допустимый размер страницы
+
+    # Кэш объектов и страниц дочерних записей
+    # memory - в памяти каждого процесса, redis - общий для процессов
+    CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    CACHE_REDIS_URL: str = 'redis://localhost:6379/0'
+    CACHE_SIZE: int = 1024  # записей на модель в памяти (0 - отключен)
+    CACHE_TTL: float = 30  # время жизни записи, сек
+
+    # Списки отдаются из значений колонок через orjson, без объектов ORM
+    # и проверки схемой ответа Pydantic
+    FAST_JSON_RESPONSES: bool = False
+
+    # Строк в одной порции потоковой выгрузки
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Сколько секунд пользователь, найденный по токену, берётся из кэша.
+    # Столько же могут действовать бан или деактивация, сделанные
+    # в другом процессе при CACHE_BACKEND=memory (0 - кэш отключен).
+    USER_CACHE_TTL: float = 5
+
+    # Cache-Control: max-age для ответов с ETag, сек
+    # (0 - клиент проверяет актуальность через If-None-Match)
+    HTTP_CACHE_MAX_AGE: int = 0
+
+    # Максимальное число элементов в одном запросе пакетного создания
+    BULK_CREATE_MAX_ITEMS: int = 1000
+
+    # Хеширование и проверка паролей вне цикла событий
+    # thread - потоки (bcrypt отпускает GIL), process - процессы
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 2  # одновременных операций с паролями
+    # Операций в очереди, сверх которых вход отклоняется с 503 (0 - без
+    # ограничения)
+    PASSWORD_HASH_MAX_QUEUE: int = 100
+
+    # Фоновая обработка жалоб для очереди модерации
+    # memory - номера новых жалоб передаются обработчику в памяти
+    # процесса, postgres - обработчик опрашивает таблицу жалоб
+    # (SELECT ... FOR UPDATE SKIP LOCKED)
+    MODERATION_QUEUE: Literal['memory', 'postgres'] = 'memory'
+    MODERATION_BATCH_SIZE: int = 100  # жалоб в одной порции
+    MODERATION_BATCH_DELAY: float = 0.5  # накопление порции, сек
+    MODERATION_POLL_INTERVAL: float = 5  # опрос таблицы, сек
+    MODERATION_QUEUE_MAX_SIZE: int = 10000  # номеров в памяти (memory)
+    # Жалоб, после которых объявление помечается в очереди модерации
+    MODERATION_FLAG_THRESHOLD: int = 5
+
+    # Фоновая очистка удалённых объявлений
+    PURGE_BATCH_SIZE: int = 1000  # строк, удаляемых одной транзакцией
+    PURGE_POLL_INTERVAL: float = 60  # проверка удалённых объявлений, сек
+
+    # Заголовок Server-Timing с временем обработки и SQL-запросов
+    # (раскрывает клиентам время работы БД, включать для отладки)
+    METRICS_SERVER_TIMING: bool = False
+
+    # Отладка N+1: одинаковые по форме SQL-запросы, повторённые за один
+    # HTTP-запрос QUERY_DEBUG_REPEAT_THRESHOLD раз и больше, попадают
+    # в журнал, а с QUERY_DEBUG_RAISE - ещё и приводят к ошибке (тесты)
+    QUERY_DEBUG: bool = False
+    QUERY_DEBUG_REPEAT_THRESHOLD: int = 5
+    QUERY_DEBUG_RAISE: bool = False
 
     @property
     def database_url(self) -> str:
@@ -28,6 +112,18 @@ class Settings(BaseSettings):
             f"@{self.DB_HOST}:{self.DB_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def replica_database_url(self) -> Optional[str]:
+        """Получить ссылку для подключения к реплике DB."""
+        if self.REPLICA_DB_HOST is None:
+            return None
+        return (
+            "postgresql+asyncpg://"
+            f"{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.REPLICA_DB_HOST}:{self.REPLICA_DB_PORT or self.DB_PORT}"
+            f"/{self.POSTGRES_DB}"
+        )
+
     class Config:
         env_file = '.env'
 
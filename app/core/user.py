@@ -1,15 +1,21 @@
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
 from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import (
-    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException
+    BaseUserManager, FastAPIUsers, IntegerIDMixin, InvalidPasswordException,
+    exceptions,
 )
 from fastapi_users.authentication import (
     AuthenticationBackend, BearerTransport, JWTStrategy
 )
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from app.core.cache import create_cache
+from app.core.hashing import PooledPasswordHelper, password_pool
+from app.core.read_your_writes import TOKEN_AUDIENCE
 from app.core.settings import settings
 from app.core.db.db import get_async_session
 from app.core.db.models import User
@@ -25,7 +31,11 @@ bearer_transport = BearerTransport(tokenUrl='auth/jwt/login')
 
 def get_jwt_strategy() -> JWTStrategy:
     """Стратегия: хранение токена в виде JWT."""
-    return JWTStrategy(secret=settings.SECRET, lifetime_seconds=36000)
+    return JWTStrategy(
+        secret=settings.SECRET,
+        lifetime_seconds=36000,
+        token_audience=TOKEN_AUDIENCE,
+    )
 
 
 # Объект бэкенда аутентификации с выбранными параметрами.
@@ -36,10 +46,21 @@ auth_backend = AuthenticationBackend(
 )
 
 
+# Пользователи, найденные по id из токена. Хеш пароля не кэшируется.
+user_cache = create_cache('current_user', ttl=settings.USER_CACHE_TTL)
+USER_CACHE_FIELDS = tuple(
+    column.key for column in User.__table__.columns
+    if column.key != 'hashed_password'
+)
+
+
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
     """
     Отвечает за регистрацию и управление пользователями.
     Даёт возможность прописывать кастомные действия.
+    Пароли хешируются и проверяются в password_pool, а не в цикле
+    событий: create, authenticate и _update заранее считают результат
+    через PooledPasswordHelper и вызывают методы fastapi-users.
     """
     async def validate_password(
         self,
@@ -56,6 +77,109 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
                 reason='Password should not contain e-mail'
             )
 
+    async def _release_connection(self) -> None:
+        """
+        Вернуть соединение в пул до ожидания очереди хеширования.
+        Иначе при наплыве входов очередь держит все соединения с БД,
+        и остальные запросы ждут соединение, а не bcrypt.
+        """
+        await self.user_db.session.commit()
+
+    async def create(
+            self,
+            user_create: UserCreate,
+            safe: bool = False,
+            request: Optional[Request] = None,
+    ) -> User:
+        """
+        Зарегистрировать пользователя.
+        Хеш считается до обращения к БД, поэтому запрос не держит
+        соединение, пока ждёт пул хеширования. Неподходящий пароль
+        отклоняется до очереди хеширования.
+        """
+        await self.validate_password(user_create.password, user_create)
+        await self.password_helper.prepare_hash(user_create.password)
+        return await super().create(user_create, safe, request)
+
+    async def authenticate(
+            self, credentials: OAuth2PasswordRequestForm
+    ) -> Optional[User]:
+        """
+        Найти пользователя по e-mail и паролю.
+        Для проверки в пуле нужен хеш пароля из БД, поэтому пользователь
+        ищется здесь и ещё раз в fastapi-users.
+        """
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            user = None
+        await self._release_connection()
+        if user is None:
+            # fastapi-users хеширует пароль и для несуществующего
+            # пользователя, чтобы время ответа не выдавало e-mail.
+            await self.password_helper.prepare_hash(credentials.password)
+        else:
+            await self.password_helper.prepare_verify(
+                credentials.password, user.hashed_password
+            )
+        return await super().authenticate(credentials)
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        """Изменить пользователя, посчитав хеш нового пароля в пуле."""
+        if 'password' in update_dict:
+            await self.validate_password(update_dict['password'], user)
+            await self._release_connection()
+            await self.password_helper.prepare_hash(update_dict['password'])
+        return await super()._update(user, update_dict)
+
+    async def get(self, id: int) -> User:
+        """
+        Получить пользователя по id, сначала из кэша.
+        Через этот метод проходит проверка токена в каждом запросе
+        с аутентификацией. Пользователь из кэша присоединяется к сессии
+        без запроса к БД, чтобы его можно было изменять и удалять.
+        Запись хранится под версией, полученной до чтения из БД, поэтому
+        чтение, начатое до изменения (бана), не вернёт её в кэш.
+        """
+        key = f'{id}:{await user_cache.get_version(str(id))}'
+        values = await user_cache.get(key)
+        if values is not None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            return await self.user_db.session.merge(user, load=False)
+        user = await super().get(id)
+        await user_cache.set(
+            key,
+            {field: getattr(user, field) for field in USER_CACHE_FIELDS},
+        )
+        return user
+
+    async def delete(self, user: User) -> None:
+        """Удалить пользователя и убрать его из кэша."""
+        await super().delete(user)
+        await user_cache.delete(f'version:{user.id}')
+
+    async def on_after_update(
+            self,
+            user: User,
+            update_dict: dict,
+            request: Optional[Request] = None,
+    ):
+        """Сбросить кэш после изменения (в т.ч. бана) пользователя."""
+        await user_cache.delete(f'version:{user.id}')
+
+    async def on_after_verify(
+            self, user: User, request: Optional[Request] = None
+    ):
+        """Сбросить кэш после подтверждения пользователя."""
+        await user_cache.delete(f'version:{user.id}')
+
+    async def on_after_reset_password(
+            self, user: User, request: Optional[Request] = None
+    ):
+        """Сбросить кэш после смены пароля."""
+        await user_cache.delete(f'version:{user.id}')
+
     async def on_after_register(
             self, user: User, request: Optional[Request] = None
     ):
@@ -65,7 +189,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
 
 
 async def get_user_manager(user_db=Depends(get_user_db)):
-    yield UserManager(user_db)
+    yield UserManager(user_db, PooledPasswordHelper(password_pool))
 
 fastapi_users = FastAPIUsers[User, int](
     get_user_manager,
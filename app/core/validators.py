@@ -4,31 +4,7 @@ from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db.models import Advert
-from app.core.db.models import User
-
-
-async def check_advert_description_is_unique(
-        advert_description: str,
-        session: AsyncSession,
-) -> None:
-    """Проверка описания объявления на уникальность."""
-    exists_criteria = (
-        select(Advert).where(
-            Advert.description == advert_description
-        ).exists()
-    )
-    db_advert_exists = await session.execute(
-        select(True).where(
-            exists_criteria
-        )
-    )
-    db_advert_exists = db_advert_exists.scalars().first()
-    if db_advert_exists:
-        raise HTTPException(
-            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
-            detail='Придумайте уникальное описание объявления!',
-        )
+from app.core.db.models import Advert, User, description_digest
 
 
 async def check_user_update_delete_rights(
@@ -55,3 +31,53 @@ async def check_user_create_rights(
             detail='У Вас нет прав на осуществление данного действия!'
         )
     return obj_db
+
+
+async def check_descriptions_are_unique(
+        descriptions: list[str],
+        session: AsyncSession,
+) -> dict[int, str]:
+    """
+    Пакетная проверка описаний объявлений на уникальность одним запросом.
+    Возвращает ошибки по индексам описаний, включая повторы внутри пакета.
+    """
+    hashes = [description_digest(description) for description in descriptions]
+    taken_hashes = await session.execute(
+        select(Advert.description_hash).where(
+            Advert.description_hash.in_(set(hashes)),
+            Advert.deleted_at.is_(None),
+        )
+    )
+    taken_hashes = set(taken_hashes.scalars().all())
+    errors = {}
+    for index, description_hash in enumerate(hashes):
+        if description_hash in taken_hashes:
+            errors[index] = 'Придумайте уникальное описание объявления!'
+        taken_hashes.add(description_hash)
+    return errors
+
+
+async def check_user_create_rights_many(
+        advert_ids: list[int],
+        user: User,
+        session: AsyncSession,
+) -> dict[int, str]:
+    """
+    Пакетная проверка прав пользователя на создание записей
+    к объявлениям одним запросом.
+    Возвращает ошибки по индексам объявлений в списке.
+    """
+    owners = await session.execute(
+        select(Advert.id, Advert.user_id).where(
+            Advert.id.in_(set(advert_ids)),
+            Advert.deleted_at.is_(None),
+        )
+    )
+    owners = dict(owners.all())
+    errors = {}
+    for index, advert_id in enumerate(advert_ids):
+        if advert_id not in owners:
+            errors[index] = 'Объект Advert не найден!'
+        elif owners[advert_id] == user.id and not user.is_superuser:
+            errors[index] = 'У Вас нет прав на осуществление данного действия!'
+    return errors
@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 
 from app.api.routers import main_router
 from app.core.settings import settings
 from app.core.db.init_db import create_first_superuser
+from app.core.hashing import password_pool
+from app.core.middleware import DBCheckoutsMiddleware, MetricsMiddleware
+from app.core.moderation import moderation_queue
+from app.core.purger import advert_purger
+from app.core.read_your_writes import remember_write
 
 app = FastAPI(
     title=settings.APP_TITLE,
@@ -10,8 +15,34 @@ app = FastAPI(
 )
 
 app.include_router(main_router)
+app.add_middleware(DBCheckoutsMiddleware)
+app.add_middleware(
+    MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING
+)
+
+@app.middleware('http')
+async def stick_reads_to_primary(request: Request, call_next):
+    """После успешной записи направлять чтение пользователя в основную БД.
+
+    Реплика отстает от основной БД, поэтому на время
+    READ_YOUR_WRITES_SECONDS пользователь отмечается в кэше,
+    и эндпоинты чтения отдают ему данные основной БД
+    (см. app/core/read_your_writes.py).
+    """
+    response = await call_next(request)
+    await remember_write(request, response)
+    return response
 
 
 @app.on_event('startup')
 async def startup():
     await create_first_superuser()
+    moderation_queue.start()
+    advert_purger.start()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    await moderation_queue.stop()
+    await advert_purger.stop()
+    password_pool.shutdown()
@@ -0,0 +1,93 @@
+"""
+Задержка чтения во время шквала входов.
+
+Несколько читателей опрашивают GET /adverts/, сначала без нагрузки,
+затем параллельно с --logins клиентами, которые без пауз выполняют
+POST /auth/jwt/login. Для каждого прогона выводятся p50, p99 и
+максимум задержки чтения и коды ответов входа. Хеширование паролей
+не должно занимать цикл событий: p99 чтения под шквалом остаётся
+близким к p99 без него.
+
+Работает с запущенным сервером, нужен httpx (pip install httpx).
+Пользователь для входа регистрируется, если его ещё нет.
+
+    python -m benchmarks.login_storm --base-url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import time
+from http import HTTPStatus
+
+import httpx
+
+EMAIL = 'login-storm@example.com'
+PASSWORD = 'secret123'
+
+
+async def reader(client, latencies, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get('/adverts/')
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        await asyncio.sleep(0.02)
+
+
+async def login(client, codes, stop):
+    while not stop.is_set():
+        response = await client.post(
+            '/auth/jwt/login', data={'username': EMAIL, 'password': PASSWORD}
+        )
+        codes[response.status_code] = codes.get(response.status_code, 0) + 1
+
+
+def percentile(latencies, share):
+    return latencies[min(len(latencies) - 1, int(share * len(latencies)))]
+
+
+async def run(client, readers, logins, duration):
+    latencies, codes, stop = [], {}, asyncio.Event()
+    tasks = [
+        asyncio.create_task(reader(client, latencies, stop))
+        for _ in range(readers)
+    ]
+    tasks += [
+        asyncio.create_task(login(client, codes, stop))
+        for _ in range(logins)
+    ]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    latencies.sort()
+    print(
+        f'logins={logins:<3} reads={len(latencies):<5} '
+        f'p50 {percentile(latencies, 0.5) * 1000:7.1f} ms   '
+        f'p99 {percentile(latencies, 0.99) * 1000:7.1f} ms   '
+        f'max {latencies[-1] * 1000:7.1f} ms   login codes {codes}'
+    )
+
+
+async def main(base_url, readers, logins, duration):
+    limits = httpx.Limits(max_connections=readers + logins)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120
+    ) as client:
+        response = await client.post(
+            '/auth/register', json={'email': EMAIL, 'password': PASSWORD}
+        )
+        if response.status_code not in (
+            HTTPStatus.CREATED, HTTPStatus.BAD_REQUEST
+        ):
+            response.raise_for_status()
+        await run(client, readers, 0, duration)
+        await run(client, readers, logins, duration)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--logins', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.base_url, args.readers, args.logins, args.duration))
@@ -0,0 +1,111 @@
+"""
+Сериализация страницы объявлений: Pydantic против orjson.
+
+Сравнивает два пути эндпоинта GET /adverts/ на одной странице
+из --rows объявлений:
+- pydantic: объекты ORM, проверка response_model (orm_mode)
+  и jsonable_encoder, как при FAST_JSON_RESPONSES=false;
+- fast: значения колонок и orjson (fast_json_response), как при
+  FAST_JSON_RESPONSES=true.
+Для каждого пути выводится медиана времени запроса и сериализации.
+
+Работает с БД из настроек (.env), миграции должны быть применены.
+Созданные объявления удаляются в конце.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api.endpoints.advert import ADVERT_LIST_FIELDS
+from app.api.responses import fast_json_response
+from app.api.schemas.advert import AdvertCreate
+from app.core.db.crud.advert import advert_crud
+from app.core.db.db import AsyncSessionLocal, engine
+from app.core.settings import settings
+from app.main import app
+
+ADVERT_LIST_ROUTE = next(
+    route for route in app.routes
+    if getattr(route, 'path', None) == '/adverts/' and 'GET' in route.methods
+)
+
+
+async def pydantic_body(session, title: str, rows: int) -> bytes:
+    page = await advert_crud.get_filtered_page(
+        session, title=title, limit=rows
+    )
+    content = await serialize_response(
+        field=ADVERT_LIST_ROUTE.secure_cloned_response_field,
+        response_content=page,
+        exclude=ADVERT_LIST_ROUTE.response_model_exclude,
+        is_coroutine=True,
+    )
+    return JSONResponse(content).body
+
+
+async def fast_body(session, title: str, rows: int) -> bytes:
+    page = await advert_crud.get_filtered_page(
+        session, title=title, limit=rows, fields=ADVERT_LIST_FIELDS
+    )
+    return fast_json_response(page).body
+
+
+async def measure(label, build_body, title, rows, repeats) -> bytes:
+    timings = []
+    async with AsyncSessionLocal() as session:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            body = await build_body(session, title, rows)
+            timings.append(time.perf_counter() - started)
+            session.expunge_all()
+    print(
+        f'{label:<9} median {statistics.median(timings) * 1000:8.1f} ms'
+        f'   body {len(body)} bytes'
+    )
+    return body
+
+
+async def main(rows: int, repeats: int):
+    settings.PAGINATION_MAX_LIMIT = max(settings.PAGINATION_MAX_LIMIT, rows)
+    title = f'Бенчмарк {uuid.uuid4().hex}'
+    created_ids = []
+    try:
+        async with AsyncSessionLocal() as session:
+            for start in range(0, rows, 1000):
+                db_objs = await advert_crud.create_many([
+                    AdvertCreate(
+                        title=title,
+                        description=f'{title} {number}',
+                        kind='Продажа',
+                        price=number % 1000 + 1,
+                    )
+                    for number in range(start, min(start + 1000, rows))
+                ], None, session)
+                created_ids += [db_obj.id for db_obj in db_objs]
+        pydantic = await measure(
+            'pydantic', pydantic_body, title, rows, repeats
+        )
+        fast = await measure('fast', fast_body, title, rows, repeats)
+        print('bodies are identical:', pydantic == fast)
+    finally:
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(created_ids), 1000):
+                await advert_crud.remove_many(
+                    created_ids[start:start + 1000], session
+                )
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeats', type=int, default=15)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeats))
@@ -0,0 +1,102 @@
+"""
+Скорость записи объявлений через слой CRUD.
+
+Сравнивает запись одним INSERT/UPDATE ... RETURNING (advert_crud)
+с прежней схемой ORM: add/изменение, commit и refresh - повторный
+SELECT после каждой записи. Каждая запись - отдельная транзакция.
+
+Работает с БД из настроек (.env), миграции должны быть применены.
+Созданные объявления удаляются в конце.
+
+    python -m benchmarks.write_throughput --count 2000
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.api.schemas.advert import AdvertCreate, AdvertUpdate
+from app.core.db.crud.advert import advert_crud
+from app.core.db.db import AsyncSessionLocal, engine
+from app.core.db.models import Advert
+
+
+async def legacy_create(obj_in, session):
+    db_obj = Advert(**advert_crud._create_values(obj_in, None))
+    session.add(db_obj)
+    await session.commit()
+    await session.refresh(db_obj)
+    return db_obj
+
+
+async def legacy_update(db_obj, obj_in, session):
+    for field, value in advert_crud._update_values(obj_in).items():
+        setattr(db_obj, field, value)
+    await session.commit()
+    await session.refresh(db_obj)
+    return db_obj
+
+
+async def crud_create(obj_in, session):
+    return await advert_crud.create(obj_in, None, session)
+
+
+async def crud_update(db_obj, obj_in, session):
+    return await advert_crud.update(db_obj, obj_in, session)
+
+
+async def run(label, create, update, count, created_ids):
+    run_id = uuid.uuid4().hex
+    objs_in = [
+        AdvertCreate(
+            title='Бенчмарк',
+            description=f'Бенчмарк {run_id} {number}',
+            kind='Продажа',
+            price=number + 1,
+        )
+        for number in range(count)
+    ]
+    async with AsyncSessionLocal() as session:
+        started = time.perf_counter()
+        db_objs = [await create(obj_in, session) for obj_in in objs_in]
+        create_time = time.perf_counter() - started
+        created_ids += [db_obj.id for db_obj in db_objs]
+        started = time.perf_counter()
+        for db_obj in db_objs:
+            await update(
+                db_obj, AdvertUpdate(price=db_obj.price + 1), session
+            )
+        update_time = time.perf_counter() - started
+    print(
+        f'{label:<24} create {count / create_time:7.0f} writes/s   '
+        f'update {count / update_time:7.0f} writes/s'
+    )
+
+
+async def main(count: int, rounds: int):
+    created_ids = []
+    try:
+        for _ in range(rounds):
+            await run(
+                'commit + refresh', legacy_create, legacy_update,
+                count, created_ids,
+            )
+            await run(
+                'RETURNING (advert_crud)', crud_create, crud_update,
+                count, created_ids,
+            )
+    finally:
+        async with AsyncSessionLocal() as session:
+            for start in range(0, len(created_ids), 1000):
+                await advert_crud.remove_many(
+                    created_ids[start:start + 1000], session
+                )
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.rounds))
@@ -0,0 +1,129 @@
+"""
+Общие фикстуры тестов.
+
+Приложение работает с отдельной БД SQLite на каждый тест: сессии
+эндпоинтов подменяются через dependency_overrides, фоновые обработчики
+не запускаются. Кэши в памяти очищаются между тестами. Включён поиск
+N+1 запросов (QUERY_DEBUG_RAISE): повторы SQL в запросе роняют тест.
+"""
+import os
+from http import HTTPStatus
+
+for name in ('POSTGRES_DB', 'POSTGRES_USER', 'POSTGRES_PASSWORD', 'DB_HOST'):
+    os.environ.setdefault(name, 'test')
+os.environ.setdefault('DB_PORT', '5432')
+os.environ.setdefault('CACHE_BACKEND', 'memory')
+# Запросы тестов проверяются на N+1: повторы формы SQL - ошибка.
+os.environ.setdefault('QUERY_DEBUG', 'true')
+os.environ.setdefault('QUERY_DEBUG_RAISE', 'true')
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, update  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession, create_async_engine,
+)
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.cache import LocalCache, model_caches  # noqa: E402
+from app.core.db.base import Base  # noqa: E402
+from app.core.db.db import (  # noqa: E402
+    get_async_session, get_read_async_session,
+)
+from app.core.db.pool import InstrumentedQueuePool  # noqa: E402
+from app.core.db.models import User  # noqa: E402
+from app.core.metrics import instrument_engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+PASSWORD = 'secret123'
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # Пул приложения, чтобы в тестах считались выдачи соединений.
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path}/test.db',
+        poolclass=InstrumentedQueuePool,
+    )
+
+    @event.listens_for(engine.sync_engine, 'connect')
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        # Без этого SQLite не выполняет ON DELETE CASCADE.
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+    instrument_engine(engine)
+    return engine
+
+
+@pytest.fixture
+def session_maker(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def client(engine, session_maker, monkeypatch):
+    async def override_session():
+        async with session_maker() as session:
+            yield session
+
+    for cache in model_caches.values():
+        if isinstance(cache, LocalCache):
+            cache.clear()
+    app.dependency_overrides[get_async_session] = override_session
+    app.dependency_overrides[get_read_async_session] = override_session
+    monkeypatch.setattr(app.router, 'on_startup', [])
+    with TestClient(app) as client:
+        client.portal.call(create_tables, engine)
+        yield client
+    app.dependency_overrides.clear()
+
+
+async def create_tables(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+def register(client, email: str, superuser: bool = False) -> dict:
+    """Зарегистрировать пользователя и вернуть заголовки с его токеном."""
+    client.post('/auth/register', json={'email': email, 'password': PASSWORD})
+    if superuser:
+        client.portal.call(make_superuser, email)
+    response = client.post(
+        '/auth/jwt/login', data={'username': email, 'password': PASSWORD}
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+async def make_superuser(email: str) -> None:
+    override_session = app.dependency_overrides[get_async_session]
+    async for session in override_session():
+        await session.execute(
+            update(User).where(User.email == email).values(is_superuser=True)
+        )
+        await session.commit()
+
+
+@pytest.fixture
+def user_headers(client):
+    return register(client, 'user@example.com')
+
+
+@pytest.fixture
+def superuser_headers(client):
+    return register(client, 'admin@example.com', superuser=True)
+
+
+def create_advert(client, headers, **fields) -> dict:
+    """Создать объявление через API и вернуть его."""
+    data = {
+        'title': 'Велосипед',
+        'description': 'Горный велосипед',
+        'kind': 'Продажа',
+        'price': 100,
+        **fields,
+    }
+    response = client.post('/adverts/', json=data, headers=headers)
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    return response.json()
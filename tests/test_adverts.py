@@ -0,0 +1,125 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core.db.crud.advert import advert_crud
+from app.core.db.models import Feedback
+from app.core.metrics import new_request_queries, request_queries
+from tests.conftest import create_advert, register
+
+
+async def remove_advert(session_maker, advert_id: int, feedbacks: int, how):
+    """
+    Добавить объявлению отзывы, удалить его и вернуть число
+    SQL-запросов удаления и число оставшихся отзывов.
+    """
+    if feedbacks:
+        async with session_maker() as session:
+            await session.execute(insert(Feedback), [
+                {'text': f'Отзыв {number}', 'advert_id': advert_id}
+                for number in range(feedbacks)
+            ])
+            await session.commit()
+    queries = new_request_queries()
+    token = request_queries.set(queries)
+    try:
+        async with session_maker() as session:
+            if how == 'remove':
+                advert = await advert_crud.get(advert_id, session)
+                await advert_crud.remove(advert, session)
+            else:
+                await advert_crud.remove_many([advert_id], session)
+    finally:
+        request_queries.reset(token)
+    async with session_maker() as session:
+        left = await session.scalar(select(func.count(Feedback.id)))
+    return queries['statements'], left
+
+
+@pytest.mark.parametrize('how', ['remove', 'remove_many'])
+def test_remove_does_not_depend_on_children(
+        client, session_maker, user_headers, how
+):
+    # Без отзывов ORM не удаляет детей, поэтому их выборка и удаление
+    # через сессию изменили бы число запросов.
+    statements = []
+    for feedbacks in (0, 100_000):
+        advert = create_advert(
+            client, user_headers, description=f'Отзывов: {feedbacks}'
+        )
+        count, left = client.portal.call(
+            remove_advert, session_maker, advert['id'], feedbacks, how
+        )
+        assert left == 0
+        statements.append(count)
+    assert statements[0] == statements[1]
+
+
+def test_description_differing_in_whitespace_is_duplicate(
+        client, user_headers
+):
+    create_advert(client, user_headers, description='Горный велосипед')
+    response = client.post('/adverts/', headers=user_headers, json={
+        'title': 'Велосипед',
+        'description': '  Горный\tвелосипед ',
+        'kind': 'Продажа',
+        'price': 100,
+    })
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_update_checks_owner(client, user_headers):
+    advert = create_advert(client, user_headers)
+    url = f'/adverts/{advert["id"]}'
+    response = client.patch(
+        url,
+        json={'price': 50},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert client.get(url).json()['price'] == 100
+    response = client.patch(url, json={'price': 200}, headers=user_headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['price'] == 200
+    assert client.get(url).json()['price'] == 200
+
+
+def test_update_missing_advert(client, user_headers):
+    response = client.patch(
+        '/adverts/100', json={'price': 200}, headers=user_headers
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    advert = create_advert(client, user_headers)
+    client.delete(f'/adverts/{advert["id"]}', headers=user_headers)
+    response = client.patch(
+        f'/adverts/{advert["id"]}', json={'price': 200}, headers=user_headers
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_superuser_updates_any_advert(
+        client, user_headers, superuser_headers
+):
+    advert = create_advert(client, user_headers)
+    response = client.patch(
+        f'/adverts/{advert["id"]}',
+        json={'title': 'Самокат'},
+        headers=superuser_headers,
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['title'] == 'Самокат'
+    assert response.json()['user_id'] == advert['user_id']
+
+
+def test_empty_update_keeps_advert(client, user_headers):
+    advert = create_advert(client, user_headers)
+    url = f'/adverts/{advert["id"]}'
+    response = client.patch(url, json={}, headers=user_headers)
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == client.get(url).json()
+    assert response.json()['price'] == advert['price']
+    response = client.patch(
+        url, json={}, headers=register(client, 'buyer@example.com')
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,135 @@
+import asyncio
+from http import HTTPStatus
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.schemas.advert import AdvertCreate
+from app.core.db.crud.advert import advert_crud
+from app.core.settings import settings
+from tests.conftest import create_advert, register
+
+
+def advert_data(description: str) -> dict:
+    return {
+        'title': 'Велосипед',
+        'description': description,
+        'kind': 'Продажа',
+        'price': 100,
+    }
+
+
+def test_adverts_bulk_reports_errors_by_index(client, user_headers):
+    create_advert(client, user_headers, description='Горный велосипед')
+    response = client.post(
+        '/adverts/bulk',
+        json=[
+            advert_data('Горный велосипед'),
+            advert_data('Детский велосипед'),
+            advert_data('Шоссейный велосипед'),
+        ],
+        headers=user_headers,
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    result = response.json()
+    assert [advert['description'] for advert in result['created']] == [
+        'Детский велосипед', 'Шоссейный велосипед',
+    ]
+    assert result['errors'] == [{
+        'index': 0,
+        'detail': 'Придумайте уникальное описание объявления!',
+    }]
+
+
+def test_adverts_bulk_rejects_duplicates_within_batch(client, user_headers):
+    response = client.post(
+        '/adverts/bulk',
+        json=[
+            advert_data('Горный велосипед'),
+            advert_data('Горный  велосипед '),
+            advert_data('Детский велосипед'),
+        ],
+        headers=user_headers,
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    result = response.json()
+    assert len(result['created']) == 2
+    assert [error['index'] for error in result['errors']] == [1]
+    response = client.get('/adverts/')
+    assert len(response.json()['items']) == 2
+
+
+def test_bulk_size_is_limited(client, user_headers):
+    adverts = [
+        advert_data(f'Велосипед {number}')
+        for number in range(settings.BULK_CREATE_MAX_ITEMS + 1)
+    ]
+    for body in (adverts, []):
+        response = client.post(
+            '/adverts/bulk', json=body, headers=user_headers
+        )
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert client.get('/adverts/').json()['items'] == []
+
+
+def test_feedbacks_bulk_reports_errors_by_index(client, user_headers):
+    advert = create_advert(client, user_headers)
+    buyer_headers = register(client, 'buyer@example.com')
+    own_advert = create_advert(
+        client, buyer_headers, description='Детский велосипед'
+    )
+    response = client.post(
+        '/feedbacks/bulk',
+        json=[
+            {'text': 'Отличный велосипед', 'advert_id': advert['id']},
+            {'text': 'Мой велосипед', 'advert_id': own_advert['id']},
+            {'text': 'Нет такого', 'advert_id': 100},
+            {'text': 'Ещё отзыв', 'advert_id': advert['id']},
+        ],
+        headers=buyer_headers,
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    result = response.json()
+    assert [feedback['text'] for feedback in result['created']] == [
+        'Отличный велосипед', 'Ещё отзыв',
+    ]
+    assert result['errors'] == [
+        {
+            'index': 1,
+            'detail': 'У Вас нет прав на осуществление данного действия!',
+        },
+        {'index': 2, 'detail': 'Объект Advert не найден!'},
+    ]
+    response = client.get(f'/adverts/{advert["id"]}')
+    assert response.json()['feedback_count'] == 2
+
+
+class ReturningSession:
+    """Сессия СУБД с RETURNING, запоминающая выполненные запросы."""
+
+    bind = SimpleNamespace(dialect=postgresql.asyncpg.dialect())
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(
+            scalars=lambda: SimpleNamespace(all=lambda: [])
+        )
+
+
+def test_bulk_insert_is_one_statement():
+    session = ReturningSession()
+    values = [
+        advert_crud._create_values(
+            AdvertCreate(**advert_data(f'Велосипед {number}')), None
+        )
+        for number in range(3)
+    ]
+    asyncio.run(advert_crud._insert_returning(session, values))
+    [statement] = session.statements
+    sql = str(statement.compile(dialect=session.bind.dialect))
+    assert sql.startswith('INSERT INTO advert')
+    assert sql.count('), (') == 2
+    assert 'RETURNING advert.id' in sql
@@ -0,0 +1,211 @@
+import asyncio
+import pickle
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+import app.core.user
+from app.api.schemas.advert import AdvertUpdate
+from app.core.cache import CacheBackend, LocalCache, RedisCache, model_caches
+from app.core.db.crud.advert import advert_crud
+from app.core.db.crud.complaint import complaint_crud
+from app.core.db.crud.feedback import feedback_crud
+from app.core.db.crud.moderation import moderation_crud
+from app.core.db.models import Advert
+from tests.conftest import create_advert, register
+
+
+def run_with_redis(check, ttl: float = 60, **client_kwargs):
+    """Выполнить check(cache) с RedisCache поверх fakeredis."""
+    async def main():
+        client = FakeRedis(**client_kwargs)
+        await check(RedisCache(client, 'cache:test', ttl))
+    asyncio.run(main())
+
+
+@pytest.fixture
+def redis_caches(monkeypatch):
+    """Кэши моделей и пользователей в Redis (fakeredis) вместо памяти."""
+    client = FakeRedis()
+    for crud in (advert_crud, complaint_crud, feedback_crud, moderation_crud):
+        name = crud.model.__tablename__
+        cache = RedisCache(client, f'cache:{name}', crud.cache.ttl)
+        monkeypatch.setattr(crud, 'cache', cache)
+        monkeypatch.setitem(model_caches, name, cache)
+    cache = RedisCache(
+        client, 'cache:current_user', app.core.user.user_cache.ttl
+    )
+    monkeypatch.setattr(app.core.user, 'user_cache', cache)
+    monkeypatch.setitem(model_caches, 'current_user', cache)
+    return client
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend(ttl=1)
+
+
+def test_redis_cache_round_trip():
+    value = {
+        'id': 1,
+        'kind': Advert.Kind.SELLING,
+        'updated_at': datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        'deleted_at': None,
+        'moderated': False,
+        'items': [{'id': 2, 'text': 'Отзыв'}],
+    }
+
+    async def check(cache):
+        await cache.set('1', value)
+        assert await cache.get('1') == value
+        assert (await cache.get('1'))['updated_at'].tzinfo is not None
+        assert cache.hits == 2
+
+    run_with_redis(check)
+
+
+def test_redis_cache_miss_and_delete():
+    async def check(cache):
+        assert await cache.get('1') is None
+        await cache.set('1', 'a')
+        await cache.set('2', 'b')
+        await cache.delete('1', '2', '3')
+        assert await cache.get('1') is None
+        assert await cache.get('2') is None
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['invalidations']) == (
+            0, 3, 2
+        )
+
+    run_with_redis(check)
+
+
+def test_redis_cache_ttl():
+    async def check(cache):
+        await cache.set('1', 'a')
+        assert 0 < await cache.client.pttl('cache:test:1') <= 60000
+
+    run_with_redis(check)
+
+    async def check_disabled(cache):
+        await cache.set('1', 'a')
+        assert await cache.get('1') is None
+
+    run_with_redis(check_disabled, ttl=0)
+
+
+def test_redis_cache_version_changes_after_delete():
+    async def check(cache):
+        version = await cache.get_version('1')
+        assert await cache.get_version('1') == version
+        await cache.delete('version:1')
+        assert await cache.get_version('1') != version
+
+    run_with_redis(check)
+
+
+def test_redis_cache_ignores_pickled_values():
+    async def check(cache):
+        await cache.client.set('cache:test:1', pickle.dumps({'id': 1}))
+        assert await cache.get('1') is None
+        assert cache.errors == 1
+
+    run_with_redis(check)
+
+
+def test_redis_cache_without_server():
+    async def check(cache):
+        await cache.set('1', 'a')
+        assert await cache.get('1') is None
+        await cache.delete('1')
+        assert cache.errors == 3
+
+    run_with_redis(check, connected=False)
+
+
+def test_local_cache_evicts_least_recently_used():
+    async def check():
+        cache = LocalCache(max_size=2, ttl=60)
+        await cache.set('1', 'a')
+        await cache.set('2', 'b')
+        await cache.get('1')
+        await cache.set('3', 'c')
+        assert await cache.get('2') is None
+        assert await cache.get('1') == 'a'
+        assert cache.stats()['evictions'] == 1
+
+    asyncio.run(check())
+
+
+def test_children_page_follows_version(client, redis_caches, user_headers):
+    advert = create_advert(client, user_headers)
+    feedbacks_url = f'/adverts/{advert["id"]}/feedbacks'
+    assert client.get(feedbacks_url).json()['items'] == []
+    hits = feedback_crud.cache.hits
+    assert client.get(feedbacks_url).json()['items'] == []
+    assert feedback_crud.cache.hits > hits
+    client.get(f'/adverts/{advert["id"]}')
+    response = client.post(
+        '/feedbacks/',
+        json={'text': 'Отличный велосипед', 'advert_id': advert['id']},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    assert len(client.get(feedbacks_url).json()['items']) == 1
+    response = client.get(f'/adverts/{advert["id"]}')
+    assert response.json()['feedback_count'] == 1
+
+
+def test_current_user_from_redis(client, redis_caches, user_headers):
+    for _ in range(2):
+        response = client.get('/users/me', headers=user_headers)
+        assert response.status_code == HTTPStatus.OK
+    assert app.core.user.user_cache.hits >= 1
+
+
+async def read_during_update(session_maker, advert_id: int) -> None:
+    """
+    Прочитать объявление через advert_crud.get так, чтобы его изменение
+    зафиксировалось и сбросило кэш между чтением из БД и записью в кэш.
+    """
+    cache = advert_crud.cache
+
+    async def set_after_update(key, value):
+        if not key.startswith('version:'):
+            async with session_maker() as session:
+                db_obj = await session.get(Advert, advert_id)
+                await advert_crud.update(
+                    db_obj, AdvertUpdate(price=200), session
+                )
+        await type(cache).set(cache, key, value)
+
+    cache.set = set_after_update
+    try:
+        async with session_maker() as session:
+            await advert_crud.get(advert_id, session)
+    finally:
+        del cache.set
+
+
+def test_stale_read_does_not_overwrite_update(
+        client, session_maker, user_headers
+):
+    advert = create_advert(client, user_headers)
+    client.portal.call(read_during_update, session_maker, advert['id'])
+    response = client.get(f'/adverts/{advert["id"]}')
+    assert response.json()['price'] == 200
+
+
+async def read_from_replica(session_maker, advert_id: int):
+    async with session_maker(info={'replica': True}) as session:
+        await advert_crud.get(advert_id, session)
+    version = await advert_crud.cache.get_version(str(advert_id))
+    return await advert_crud.cache.get(f'{advert_id}:{version}')
+
+
+def test_replica_reads_are_not_cached(client, session_maker, user_headers):
+    advert = create_advert(client, user_headers)
+    cached = client.portal.call(read_from_replica, session_maker, advert['id'])
+    assert cached is None
@@ -0,0 +1,38 @@
+from http import HTTPStatus
+
+import pytest
+
+from app.core.db.pool import request_checkout_stats
+from tests.conftest import PASSWORD, create_advert, register
+
+
+@pytest.fixture
+def checkout_stats(monkeypatch):
+    """Статистика выдачи соединений только для запросов теста."""
+    for key in request_checkout_stats:
+        monkeypatch.setitem(request_checkout_stats, key, 0)
+    return request_checkout_stats
+
+
+def test_authenticated_write_holds_one_connection(
+        client, user_headers, checkout_stats
+):
+    create_advert(client, user_headers)
+    assert checkout_stats['requests'] == 1
+    assert checkout_stats['max_checkouts_per_request'] == 1
+    assert checkout_stats['max_connections_per_request'] == 1
+    assert checkout_stats['requests_multi_connection'] == 0
+
+
+def test_password_hashing_releases_connection(client, checkout_stats):
+    # Перед хешированием соединение возвращается в пул, а затем берётся
+    # снова: выдач больше одной, но одновременно - одно соединение.
+    headers = register(client, 'user@example.com')
+    response = client.patch(
+        '/users/me', json={'password': f'{PASSWORD}4'}, headers=headers
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert checkout_stats['requests'] == 3
+    assert checkout_stats['max_checkouts_per_request'] > 1
+    assert checkout_stats['max_connections_per_request'] == 1
+    assert checkout_stats['requests_multi_connection'] == 0
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.conftest import create_advert, register
+
+
+@pytest.fixture
+def feedback(client, user_headers):
+    """Отзыв buyer@example.com на объявление user@example.com."""
+    advert = create_advert(client, user_headers)
+    response = client.post(
+        '/feedbacks/',
+        json={'text': 'Отличный велосипед', 'advert_id': advert['id']},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    return response.json()
+
+
+def test_feedback_is_hidden_after_advert_delete(client, user_headers):
+    advert = create_advert(client, user_headers)
+    response = client.post(
+        '/feedbacks/',
+        json={'text': 'Отличный велосипед', 'advert_id': advert['id']},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    url = f'/feedbacks/{response.json()["id"]}'
+    for _ in range(2):
+        assert client.get(url).status_code == HTTPStatus.OK
+    response = client.delete(
+        f'/adverts/{advert["id"]}', headers=user_headers
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    response = client.get(f'/adverts/{advert["id"]}/feedbacks')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_update_feedback_checks_owner(client, user_headers, feedback):
+    url = f'/feedbacks/{feedback["id"]}'
+    response = client.patch(url, json={'text': 'Плохо'}, headers=user_headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert client.get(url).json()['text'] == 'Отличный велосипед'
+    response = client.patch(
+        url,
+        json={'text': 'Хорошо'},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert client.get(url).json()['text'] == 'Хорошо'
+
+
+def test_update_missing_feedback(client, user_headers):
+    response = client.patch(
+        '/feedbacks/100', json={'text': 'Хорошо'}, headers=user_headers
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_superuser_updates_any_feedback(
+        client, superuser_headers, feedback
+):
+    response = client.patch(
+        f'/feedbacks/{feedback["id"]}',
+        json={'text': 'Скрыто модератором'},
+        headers=superuser_headers,
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['text'] == 'Скрыто модератором'
+    assert response.json()['user_id'] == feedback['user_id']
+
+
+def test_empty_update_keeps_feedback(client, feedback):
+    response = client.patch(
+        f'/feedbacks/{feedback["id"]}',
+        json={},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json() == feedback
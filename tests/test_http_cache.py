@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+from tests.conftest import create_advert, register
+
+
+def test_matching_etag_is_not_modified(client, user_headers):
+    advert = create_advert(client, user_headers)
+    for url in (f'/adverts/{advert["id"]}', '/adverts/'):
+        response = client.get(url)
+        etag = response.headers['etag']
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b''
+        assert response.headers['etag'] == etag
+        response = client.get(url, headers={'If-None-Match': 'W/"other"'})
+        assert response.status_code == HTTPStatus.OK
+
+
+def test_etag_changes_after_update(client, user_headers):
+    advert = create_advert(client, user_headers)
+    urls = (f'/adverts/{advert["id"]}', '/adverts/')
+    etags = [client.get(url).headers['etag'] for url in urls]
+    response = client.patch(
+        urls[0], json={'price': 200}, headers=user_headers
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    for url, etag in zip(urls, etags):
+        response = client.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == HTTPStatus.OK
+        assert response.headers['etag'] != etag
+
+
+def test_etag_changes_after_feedback(client, user_headers):
+    advert = create_advert(client, user_headers)
+    url = f'/adverts/{advert["id"]}'
+    etag = client.get(url).headers['etag']
+    response = client.post(
+        '/feedbacks/',
+        json={'text': 'Отличный велосипед', 'advert_id': advert['id']},
+        headers=register(client, 'buyer@example.com'),
+    )
+    assert response.status_code == HTTPStatus.CREATED, response.text
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+    assert response.json()['feedback_count'] == 1
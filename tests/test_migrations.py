@@ -0,0 +1,72 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+
+VERSIONS = Path(__file__).parent.parent / 'alembic' / 'versions'
+
+
+def load_migration(name: str):
+    spec = importlib.util.spec_from_file_location(name, VERSIONS / name)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+@pytest.fixture
+def description_hash_migration():
+    return load_migration(
+        'c7e2f08a913d_replace_advert_description_unique_index.py'
+    )
+
+
+@pytest.fixture
+def connection(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/migration.db')
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE advert (id INTEGER PRIMARY KEY, '
+            'description TEXT, description_hash VARCHAR(64))'
+        ))
+        yield connection
+
+
+def add_adverts(connection, descriptions):
+    connection.execute(
+        text('INSERT INTO advert (description) VALUES (:description)'),
+        [{'description': description} for description in descriptions],
+    )
+
+
+def test_backfill_hashes_unique_descriptions(
+        description_hash_migration, connection, monkeypatch
+):
+    monkeypatch.setattr(description_hash_migration, 'BACKFILL_BATCH_SIZE', 2)
+    add_adverts(connection, ['Велосипед', 'Самокат', 'Ролики'])
+    description_hash_migration.backfill_description_hashes(connection)
+    description_hash_migration.check_description_hashes_are_unique(
+        connection
+    )
+    hashes = connection.execute(
+        text('SELECT description_hash FROM advert WHERE description_hash '
+             'IS NOT NULL')
+    ).scalars().all()
+    assert len(set(hashes)) == 3
+
+
+def test_whitespace_duplicates_stop_migration(
+        description_hash_migration, connection
+):
+    add_adverts(connection, [
+        'Горный велосипед', 'Самокат', 'Горный  велосипед ',
+        'Ролики', '\tРолики',
+    ])
+    description_hash_migration.backfill_description_hashes(connection)
+    with pytest.raises(RuntimeError) as error:
+        description_hash_migration.check_description_hashes_are_unique(
+            connection
+        )
+    message = str(error.value)
+    assert '1, 3' in message
+    assert '4, 5' in message
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import app.core.moderation
+from app.core.db.crud.moderation import moderation_crud
+from app.core.db.models import Complaint
+from app.core.moderation import ModerationQueue
+from app.core.settings import settings
+from tests.conftest import create_advert
+
+
+async def add_complaints(session_maker, *advert_ids: int) -> list[int]:
+    """Добавить по жалобе на каждое объявление и вернуть их id."""
+    complaints = [
+        Complaint(text='Обман', advert_id=advert_id)
+        for advert_id in advert_ids
+    ]
+    async with session_maker() as session:
+        session.add_all(complaints)
+        await session.commit()
+    return [complaint.id for complaint in complaints]
+
+
+async def moderate(session_maker, complaint_ids=None) -> int:
+    async with session_maker() as session:
+        return await moderation_crud.moderate(session, complaint_ids)
+
+
+async def queue_item(session_maker, advert_id: int):
+    async with session_maker() as session:
+        return await moderation_crud.get_by_advert(advert_id, session)
+
+
+@pytest.fixture
+def adverts(client, user_headers):
+    return [
+        create_advert(client, user_headers, description=f'Объявление {n}')
+        for n in range(2)
+    ]
+
+
+def test_moderate_upserts_queue_rows(client, session_maker, adverts):
+    first, second = (advert['id'] for advert in adverts)
+    call = client.portal.call
+    call(add_complaints, session_maker, first, first, second)
+    assert call(moderate, session_maker) == 3
+    assert call(moderate, session_maker) == 0
+    [last_id] = call(add_complaints, session_maker, first)
+    assert call(moderate, session_maker) == 1
+    item = call(queue_item, session_maker, first)
+    assert (item.pending_count, item.last_complaint_id) == (3, last_id)
+    assert call(queue_item, session_maker, second).pending_count == 1
+
+
+def test_moderate_flags_advert_at_threshold(
+        client, session_maker, adverts, monkeypatch
+):
+    monkeypatch.setattr(settings, 'MODERATION_FLAG_THRESHOLD', 3)
+    advert_id = adverts[0]['id']
+    call = client.portal.call
+    call(add_complaints, session_maker, advert_id, advert_id)
+    call(moderate, session_maker)
+    assert call(queue_item, session_maker, advert_id).flagged_at is None
+    call(add_complaints, session_maker, advert_id)
+    call(moderate, session_maker)
+    flagged_at = call(queue_item, session_maker, advert_id).flagged_at
+    assert flagged_at is not None
+    call(add_complaints, session_maker, advert_id)
+    call(moderate, session_maker)
+    item = call(queue_item, session_maker, advert_id)
+    assert (item.pending_count, item.flagged_at) == (4, flagged_at)
+
+
+def test_moderate_takes_only_given_complaints(client, session_maker, adverts):
+    advert_id = adverts[0]['id']
+    call = client.portal.call
+    first, second = call(add_complaints, session_maker, advert_id, advert_id)
+    assert call(moderate, session_maker, [second]) == 1
+    item = call(queue_item, session_maker, advert_id)
+    assert (item.pending_count, item.last_complaint_id) == (1, second)
+    assert call(moderate, session_maker, [first, second]) == 1
+
+
+def test_moderate_skips_locked_complaints():
+    statements = []
+
+    async def execute(statement):
+        statements.append(statement)
+        return SimpleNamespace(all=lambda: [])
+
+    session = SimpleNamespace(
+        bind=SimpleNamespace(dialect=postgresql.asyncpg.dialect()),
+        execute=execute,
+    )
+    assert asyncio.run(moderation_crud.moderate(session)) == 0
+    [query] = statements
+    sql = str(query.compile(dialect=session.bind.dialect))
+    assert sql.endswith('FOR UPDATE SKIP LOCKED')
+
+
+@pytest.fixture
+def queue(session_maker, monkeypatch):
+    """Очередь в памяти на 2 номера с обработкой без задержек."""
+    monkeypatch.setattr(
+        app.core.moderation, 'AsyncSessionLocal', session_maker
+    )
+    return ModerationQueue(
+        'memory', batch_size=10, batch_delay=0, poll_interval=0, max_size=2
+    )
+
+
+async def run_queue(queue, session_maker, advert_id: int, count: int):
+    """Передать очереди count новых жалоб и дождаться их учёта."""
+    queue.start()
+    await asyncio.sleep(0.05)
+    queue.put(*await add_complaints(session_maker, *[advert_id] * count))
+    for _ in range(100):
+        if queue.processed == count:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+
+def test_full_queue_falls_back_to_table(
+        client, session_maker, adverts, queue
+):
+    advert_id = adverts[0]['id']
+    client.portal.call(run_queue, queue, session_maker, advert_id, 3)
+    stats = queue.stats()
+    assert (stats['enqueued'], stats['dropped']) == (2, 1)
+    assert (stats['processed'], stats['queued']) == (3, 0)
+    item = client.portal.call(queue_item, session_maker, advert_id)
+    assert item.pending_count == 3
+
+
+def test_failed_batch_is_processed_again(
+        client, session_maker, adverts, queue, monkeypatch, caplog
+):
+    advert_id = adverts[0]['id']
+    calls = []
+
+    async def fail_once(session, complaint_ids=None):
+        # Первый вызов - просмотр таблицы при запуске, второй - порция.
+        calls.append(complaint_ids)
+        if len(calls) == 2:
+            raise ConnectionError('БД недоступна')
+        return await type(moderation_crud).moderate(
+            moderation_crud, session, complaint_ids
+        )
+
+    monkeypatch.setattr(moderation_crud, 'moderate', fail_once)
+    with caplog.at_level(logging.ERROR, logger='app.core.moderation'):
+        client.portal.call(run_queue, queue, session_maker, advert_id, 2)
+    failed_ids = calls[1]
+    assert len(failed_ids) == 2
+    assert str(failed_ids) in caplog.text
+    assert (queue.errors, queue.processed) == (1, 2)
+    item = client.portal.call(queue_item, session_maker, advert_id)
+    assert item.pending_count == 2
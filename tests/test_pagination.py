@@ -0,0 +1,63 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.conftest import create_advert
+
+
+def make_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_pages_follow_cursor(client, user_headers):
+    for price in (30, 10, 20):
+        create_advert(
+            client, user_headers, price=price, description=f'Цена {price}'
+        )
+    prices = []
+    cursor = None
+    while True:
+        params = {'order_by': 'price', 'limit': 2}
+        if cursor is not None:
+            params['cursor'] = cursor
+        page = client.get('/adverts/', params=params).json()
+        prices += [item['price'] for item in page['items']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert prices == [10, 20, 30]
+
+
+@pytest.mark.parametrize('cursor', [
+    make_cursor('price', 'abc', 1),
+    make_cursor('price', None, 1),
+    make_cursor('price', True, 1),
+    make_cursor('price', 10, 'abc'),
+    make_cursor('title', 10, 1),
+    'not-a-cursor',
+])
+def test_invalid_cursor_is_rejected(client, user_headers, cursor):
+    create_advert(client, user_headers)
+    response = client.get(
+        '/adverts/', params={'order_by': 'price', 'cursor': cursor}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_search_cursor_accepts_score(client, user_headers):
+    for number in range(3):
+        create_advert(client, user_headers, description=f'Велосипед {number}')
+    page = client.get(
+        '/adverts/search', params={'q': 'велосипед', 'limit': 2}
+    ).json()
+    response = client.get('/adverts/search', params={
+        'q': 'велосипед', 'limit': 2, 'cursor': page['next_cursor'],
+    })
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['items']) == 1
+    response = client.get('/adverts/search', params={
+        'q': 'велосипед', 'cursor': make_cursor('rank', 'abc', 1),
+    })
+    assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.middleware import MetricsMiddleware
+from app.core.query_debug import RepeatedQueriesError
+from app.core.settings import settings
+
+
+@pytest.fixture
+def debug_app(engine, monkeypatch):
+    """Приложение с N+1: маршруты повторяют один SQL-запрос 3 раза."""
+    monkeypatch.setattr(settings, 'QUERY_DEBUG', True)
+    monkeypatch.setattr(settings, 'QUERY_DEBUG_RAISE', True)
+    monkeypatch.setattr(settings, 'QUERY_DEBUG_REPEAT_THRESHOLD', 3)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    async def select_three_times():
+        async with engine.connect() as connection:
+            for number in range(3):
+                await connection.execute(
+                    text('SELECT :number'), {'number': number}
+                )
+
+    @app.get('/items')
+    async def items():
+        await select_three_times()
+        return {'items': []}
+
+    @app.get('/stream')
+    async def stream():
+        async def chunks():
+            yield b'['
+            await select_three_times()
+            yield b']'
+        return StreamingResponse(chunks())
+
+    return app
+
+
+def test_repeated_queries_fail_the_response(debug_app):
+    client = TestClient(debug_app, raise_server_exceptions=False)
+    response = client.get('/items')
+    assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+@pytest.mark.parametrize('url', ['/items', '/stream'])
+def test_repeated_queries_raise_in_tests(debug_app, url):
+    with pytest.raises(RepeatedQueriesError):
+        TestClient(debug_app).get(url)
@@ -0,0 +1,64 @@
+import threading
+from http import HTTPStatus
+
+import app.core.hashing
+from app.core.cache import model_caches
+from app.core.hashing import password_pool
+from tests.conftest import PASSWORD, register
+
+
+def test_superuser_updates_self_from_cache(client, superuser_headers):
+    user = client.get('/users/me', headers=superuser_headers).json()
+    # Пользователь из токена загружается из БД, а тот же пользователь
+    # по id в пути - уже из кэша, в ту же сессию.
+    for cache in model_caches.values():
+        cache.clear()
+    response = client.patch(
+        f'/users/{user["id"]}',
+        json={'email': 'boss@example.com'},
+        headers=superuser_headers,
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    assert response.json()['email'] == 'boss@example.com'
+    response = client.get('/users/me', headers=superuser_headers)
+    assert response.json()['email'] == 'boss@example.com'
+
+
+def test_user_updates_password_from_cache(client, user_headers):
+    client.get('/users/me', headers=user_headers)
+    # Теперь пользователь из токена берётся из кэша, без хеша пароля.
+    response = client.patch(
+        '/users/me', json={'password': 'another123'}, headers=user_headers
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    response = client.post('/auth/jwt/login', data={
+        'username': 'user@example.com', 'password': 'another123',
+    })
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_passwords_are_hashed_in_pool(client, monkeypatch):
+    threads = []
+    helper = app.core.hashing.password_helper
+    for name in ('hash', 'verify_and_update'):
+        def record(*args, method=getattr(helper, name)):
+            threads.append(threading.current_thread().name)
+            return method(*args)
+        monkeypatch.setattr(helper, name, record)
+    completed = password_pool.completed
+    headers = register(client, 'user@example.com')
+    for username, password, status in (
+            ('user@example.com', 'wrong123', HTTPStatus.BAD_REQUEST),
+            ('nobody@example.com', PASSWORD, HTTPStatus.BAD_REQUEST),
+    ):
+        response = client.post('/auth/jwt/login', data={
+            'username': username, 'password': password,
+        })
+        assert response.status_code == status
+    response = client.patch(
+        '/users/me', json={'password': 'another123'}, headers=headers
+    )
+    assert response.status_code == HTTPStatus.OK, response.text
+    # Регистрация, три входа и смена пароля - каждый раз в пуле.
+    assert password_pool.completed - completed == len(threads) == 5
+    assert all(name.startswith('password-hashing') for name in threads)